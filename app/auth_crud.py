@@ -1,7 +1,7 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from . import models, schemas
-from .security import hash_password, verify_password, create_access_token
+from .security import hash_password_async, verify_and_update_password_async, create_access_token
 
 # Crear usuario (registro)
 async def register_user(session: AsyncSession, payload: schemas.UserCreate):
@@ -15,7 +15,7 @@ async def register_user(session: AsyncSession, payload: schemas.UserCreate):
 
     user = models.User(
         email=payload.email,
-        hashed_password=hash_password(payload.password),
+        hashed_password=await hash_password_async(payload.password),
         is_active=True,
     )
     session.add(user)
@@ -32,10 +32,16 @@ async def login_user(session: AsyncSession, email: str, password: str):
     if not user:
         return None
 
-    # checar password
-    if not verify_password(password, user.hashed_password):
+    # checar password (en el pool de hashing, fuera del event loop)
+    ok, new_hash = await verify_and_update_password_async(password, user.hashed_password)
+    if not ok:
         return None
 
+    # rehash transparente si el hash guardado usa parámetros viejos
+    if new_hash:
+        user.hashed_password = new_hash
+        await session.commit()
+
     # si pasó las validaciones, crear JWT
     token = create_access_token(subject=user.email)
     return token, user
@@ -1,10 +1,75 @@
+from datetime import datetime, timedelta, timezone
 from typing import Literal
-from sqlalchemy import select, func, update, delete
+from sqlalchemy import select, func, insert, update, delete, and_, or_, case, tuple_, literal_column, table, column
 from sqlalchemy.ext.asyncio import AsyncSession
-from .models import Task
+from sqlalchemy.orm import aliased
+from .db import IS_SQLITE
+from .models import Task, TaskStats, User
 from . import schemas
+from .pagination import (
+    TotalMode, decode_cursor, encode_cursor, get_cached_total, store_total, invalidate_totals,
+)
 
 OrderBy = Literal["due_date", "created_at", "title"]
+SearchOrderBy = Literal["relevance", "due_date", "created_at", "title"]
+
+# tabla virtual FTS5 (creada en la migración 4, fuera de Base.metadata)
+tasks_fts = table("tasks_fts", column("rowid"))
+
+# columnas de schemas.TaskOut, en el mismo orden, para el listado con filas planas
+TASK_OUT_COLUMNS = (
+    Task.title, Task.description, Task.is_completed, Task.due_date,
+    Task.id, Task.created_at, Task.updated_at, Task.version,
+)
+TASK_OUT_FIELDS = tuple(col.key for col in TASK_OUT_COLUMNS)
+
+
+def _live(user_id: int) -> list:
+    # tareas del usuario que no son tombstones (borrado lógico)
+    return [Task.user_id == user_id, Task.deleted_at.is_(None)]
+
+
+def _order_column(order_by: OrderBy):
+    if order_by == "due_date":
+        return Task.due_date
+    elif order_by == "title":
+        return Task.title
+    return Task.created_at
+
+
+def _seek_after(user_id: int, order_by: OrderBy, order_dir: str, value, task_id: int) -> list:
+    # condiciones keyset sobre (order_col, id), una por tramo y en orden de lectura. Los NULL de
+    # due_date van primero en asc y al final en desc; un OR entre el bloque NULL y el resto no
+    # se planifica como range seek, así que cruzar ese límite es un segundo tramo (otra consulta)
+    order_col = _order_column(order_by)
+    desc = order_dir == "desc"
+    if value is None:
+        same = and_(order_col.is_(None), Task.id < task_id if desc else Task.id > task_id)
+        return [same] if desc else [same, order_col.is_not(None)]
+
+    # se compara contra el valor guardado de la fila ancla (mismo formato en disco);
+    # si la fila ya no existe se usa el valor del cursor. El cursor no va firmado: la ancla
+    # solo puede ser una tarea del mismo usuario (si no, filtraría valores de otros)
+    anchor_task = aliased(Task)
+    anchor = func.coalesce(
+        select(getattr(anchor_task, order_by))
+        .where(anchor_task.id == task_id, anchor_task.user_id == user_id)
+        .scalar_subquery(),
+        value,
+    )
+    # comparación de tuplas para que el índice (user_id, [is_completed,] order_col, id) haga un range seek
+    key, after = tuple_(order_col, Task.id), tuple_(anchor, task_id)
+    if desc:
+        return [key < after, order_col.is_(None)] if order_by == "due_date" else [key < after]
+    return [key > after]
+
+
+async def count_tasks(session: AsyncSession, user_id: int, completed: bool | None) -> int:
+    count_q = select(func.count()).select_from(Task).where(*_live(user_id))
+    if completed is not None:
+        count_q = count_q.where(Task.is_completed == completed)
+    return (await session.execute(count_q)).scalar_one()
+
 
 async def list_tasks(
     session: AsyncSession,
@@ -14,72 +79,455 @@ async def list_tasks(
     offset: int,
     order_by: OrderBy,
     order_dir: str,
+    cursor: str | None = None,
+    total_mode: TotalMode = "exact",
+    rows: bool = False,
 ):
-    q = select(Task).where(Task.user_id == user_id)
+    # rows=True devuelve dicts planos con TASK_OUT_FIELDS en vez de entidades ORM (sin identity map)
+    q = select(*TASK_OUT_COLUMNS) if rows else select(Task)
+    q = q.where(*_live(user_id))
     if completed is not None:
         q = q.where(Task.is_completed == completed)
 
-    if order_by == "due_date":
-        order_col = Task.due_date
-    elif order_by == "title":
-        order_col = Task.title
+    order_col = _order_column(order_by)
+    if order_dir == "desc":
+        order_col, id_col = order_col.desc(), Task.id.desc()
+        if order_by == "due_date":
+            order_col = order_col.nulls_last()
     else:
-        order_col = Task.created_at
+        order_col, id_col = order_col.asc(), Task.id.asc()
+        if order_by == "due_date":
+            order_col = order_col.nulls_first()
+
+    if cursor:
+        value, task_id = decode_cursor(cursor, order_by, order_dir)
+        segments = [q.where(cond) for cond in _seek_after(user_id, order_by, order_dir, value, task_id)]
+    else:
+        segments = [q.offset(offset)]
+
+    # se pide una fila de más para saber si hay siguiente página; el tramo siguiente
+    # solo se consulta si el anterior no alcanzó
+    items = []
+    for segment in segments:
+        res = await session.execute(segment.order_by(order_col, id_col).limit(limit + 1 - len(items)))
+        if rows:
+            # dict(zip()) es bastante más barato que Row._asdict()
+            items += [dict(zip(TASK_OUT_FIELDS, row)) for row in res.all()]
+        else:
+            items += res.scalars().all()
+        if len(items) > limit:
+            break
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        value, last_id = (last[order_by], last["id"]) if rows else (getattr(last, order_by), last.id)
+        next_cursor = encode_cursor(order_by, order_dir, value, last_id)
+
+    if total_mode == "none":
+        total = None
+    elif total_mode == "exact":
+        total = await count_tasks(session, user_id, completed)
+    else:
+        total = get_cached_total(user_id, completed, allow_stale=total_mode == "estimate")
+        if total is None:
+            total = await count_tasks(session, user_id, completed)
+            store_total(user_id, completed, total)
+
+    return items, total, next_cursor
 
-    q = q.order_by(order_col.desc() if order_dir == "desc" else order_col.asc()).limit(limit).offset(offset)
-    res = await session.execute(q)
-    items = res.scalars().all()
 
-    count_q = select(func.count()).select_from(Task).where(Task.user_id == user_id)
+def _fts_query(user_id: int, q: str) -> str:
+    # cada palabra como frase entre comillas con prefijo (sin sintaxis FTS del usuario),
+    # restringida a title/description y a las filas del usuario
+    terms = " ".join('"' + term.replace('"', '""') + '"*' for term in q.split())
+    return f'owner : "u{user_id}" AND {{title description}} : ({terms})'
+
+
+async def search_tasks(
+    session: AsyncSession,
+    user_id: int,
+    q: str,
+    completed: bool | None,
+    limit: int,
+    offset: int,
+    order_by: SearchOrderBy,
+    order_dir: str,
+    with_total: bool = True,
+):
+    conditions = _live(user_id)
     if completed is not None:
-        count_q = count_q.where(Task.is_completed == completed)
-    total = (await session.execute(count_q)).scalar_one()
+        conditions.append(Task.is_completed == completed)
+
+    if IS_SQLITE:
+        match = literal_column("tasks_fts").op("MATCH")(_fts_query(user_id, q))
+        base = select(Task).join(tasks_fts, tasks_fts.c.rowid == Task.id).where(match, *conditions)
+        # bm25: menor es mejor; el título pesa más que la descripción
+        relevance = func.bm25(literal_column("tasks_fts"), 10.0, 1.0, 0.0)
+    else:
+        # autoescape: "%" y "_" del usuario se buscan literalmente, no como comodines
+        terms = [
+            or_(Task.title.icontains(term, autoescape=True), Task.description.icontains(term, autoescape=True))
+            for term in q.split()
+        ]
+        base = select(Task).where(*terms, *conditions)
+        relevance = None
+
+    if order_by == "relevance":
+        order = [relevance, Task.id] if relevance is not None else [Task.id.desc()]
+    else:
+        order_col = _order_column(order_by)
+        order = [order_col.desc(), Task.id.desc()] if order_dir == "desc" else [order_col.asc(), Task.id.asc()]
+
+    res = await session.execute(base.order_by(*order).limit(limit).offset(offset))
+    items = res.scalars().all()
 
+    total = None
+    if with_total:
+        total = (await session.execute(select(func.count()).select_from(base.subquery()))).scalar_one()
     return items, total
 
 
+async def get_tasks_state(session: AsyncSession, user_id: int):
+    # contador de cambios del usuario: valida ETag/Last-Modified sin tocar la tabla tasks
+    res = await session.execute(select(User.tasks_version, User.tasks_changed_at).where(User.id == user_id))
+    return res.one()
+
+
+async def _begin_change(session: AsyncSession, user_id: int) -> int:
+    # incrementa el contador antes de escribir (toma el lock de la fila del usuario) y devuelve
+    # el número de cambio que se guarda en tasks.change_seq; así es monotónico por usuario
+    res = await session.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(tasks_version=User.tasks_version + 1, tasks_changed_at=func.now())
+        .returning(User.tasks_version)
+        .execution_options(synchronize_session=False)
+    )
+    return res.scalar_one()
+
+
+async def _finish_change(session: AsyncSession, user_id: int, changed: bool = True) -> None:
+    # si nada cambió se revierte también el incremento del contador; lo leído en la
+    # transacción se separa de la sesión para que el rollback no lo expire
+    if not changed:
+        session.expunge_all()
+        await session.rollback()
+        return
+    await session.commit()
+    invalidate_totals(user_id)
+
+
+async def _bump_stats(session: AsyncSession, user_id: int, total: int = 0, completed: int = 0) -> None:
+    # contadores de task_stats en la misma transacción; el lock de la fila del usuario
+    # (_begin_change) serializa las escrituras, así que UPDATE y si falta INSERT no compiten
+    if not total and not completed:
+        return
+    res = await session.execute(
+        update(TaskStats)
+        .where(TaskStats.user_id == user_id)
+        .values(total=TaskStats.total + total, completed=TaskStats.completed + completed)
+        .execution_options(synchronize_session=False)
+    )
+    if res.rowcount == 0:
+        await session.execute(insert(TaskStats).values(user_id=user_id, total=total, completed=completed))
+
+
+async def _completed_delta(session: AsyncSession, conditions: list, is_completed: bool) -> int:
+    # cuánto cambia "completed" si las filas que cumplen conditions pasan a is_completed
+    flips = (await session.execute(
+        select(func.count()).select_from(Task).where(*conditions, Task.is_completed != is_completed)
+    )).scalar_one()
+    return flips if is_completed else -flips
+
+
 async def get_task(session: AsyncSession, user_id: int, task_id: int):
-    res = await session.execute(select(Task).where(Task.id == task_id, Task.user_id == user_id))
+    res = await session.execute(select(Task).where(Task.id == task_id, *_live(user_id)))
     return res.scalar_one_or_none()
 
 
 async def create_task(session: AsyncSession, user_id: int, payload: schemas.TaskCreate):
+    seq = await _begin_change(session, user_id)
     task = Task(
         title=payload.title,
         description=payload.description,
         is_completed=payload.is_completed,
         due_date=payload.due_date,
         user_id=user_id,
+        change_seq=seq,
     )
     session.add(task)
-    await session.commit()
+    await _bump_stats(session, user_id, total=1, completed=int(payload.is_completed))
+    await _finish_change(session, user_id)
     await session.refresh(task)
     return task
 
 
-async def update_task(session: AsyncSession, user_id: int, task_id: int, payload: schemas.TaskUpdate):
-    task = await get_task(session, user_id, task_id)
-    if not task:
-        return None
+def _update_values(payload: schemas.TaskUpdate) -> dict:
+    # None significa "no cambiar"
+    return payload.model_dump(exclude_none=True, exclude={"id"})
 
-    if payload.title is not None:
-        task.title = payload.title
-    if payload.description is not None:
-        task.description = payload.description
-    if payload.is_completed is not None:
-        task.is_completed = payload.is_completed
-    if payload.due_date is not None:
-        task.due_date = payload.due_date
 
-    await session.commit()
-    await session.refresh(task)
+class VersionConflict(Exception):
+    pass
+
+
+def _raise_if_conflict(task_id: int, expected_versions: set[int] | None) -> None:
+    # solo en el camino de fallo: con If-Match, tanto "versión distinta" como "no existe"
+    # hacen fallar la precondición (412); sin If-Match el llamador responde 404
+    if expected_versions is not None:
+        raise VersionConflict(task_id)
+
+
+async def update_task(
+    session: AsyncSession,
+    user_id: int,
+    task_id: int,
+    payload: schemas.TaskUpdate,
+    expected_versions: set[int] | None = None,
+):
+    values = _update_values(payload)
+    conditions = [Task.id == task_id, *_live(user_id)]
+    if expected_versions is not None:
+        conditions.append(Task.version.in_(expected_versions))
+
+    if not values:
+        res = await session.execute(select(Task).where(*conditions))
+        task = res.scalar_one_or_none()
+    else:
+        # un solo UPDATE ... RETURNING: sin SELECT previo ni refresh posterior
+        seq = await _begin_change(session, user_id)
+        if "is_completed" in values:
+            await _bump_stats(session, user_id, completed=await _completed_delta(session, conditions, values["is_completed"]))
+        res = await session.execute(
+            update(Task)
+            .where(*conditions)
+            .values(**values, version=Task.version + 1, change_seq=seq)
+            .returning(Task)
+            .execution_options(populate_existing=True)
+        )
+        task = res.scalar_one_or_none()
+        await _finish_change(session, user_id, changed=task is not None)
+
+    if task is None:
+        _raise_if_conflict(task_id, expected_versions)
     return task
 
 
-async def delete_task(session: AsyncSession, user_id: int, task_id: int) -> bool:
-    task = await get_task(session, user_id, task_id)
-    if not task:
-        return False
-    await session.delete(task)
+def _tombstone_values(seq: int) -> dict:
+    # borrado lógico: la fila queda como tombstone para /tasks/changes
+    return {"deleted_at": func.now(), "version": Task.version + 1, "change_seq": seq}
+
+
+async def delete_task(session: AsyncSession, user_id: int, task_id: int, expected_versions: set[int] | None = None) -> bool:
+    conditions = [Task.id == task_id, *_live(user_id)]
+    if expected_versions is not None:
+        conditions.append(Task.version.in_(expected_versions))
+
+    seq = await _begin_change(session, user_id)
+    res = await session.execute(
+        update(Task).where(*conditions).values(**_tombstone_values(seq)).returning(Task.id, Task.is_completed)
+    )
+    row = res.one_or_none()
+    deleted = row is not None
+    if deleted:
+        await _bump_stats(session, user_id, total=-1, completed=-int(row.is_completed))
+    await _finish_change(session, user_id, changed=deleted)
+    if not deleted:
+        _raise_if_conflict(task_id, expected_versions)
+    return deleted
+
+
+# ======= DELTA SYNC =======
+
+class ChangesExpired(Exception):
+    pass
+
+
+async def list_changes(session: AsyncSession, user_id: int, since: tuple[int, int], limit: int):
+    # cambios (incluye tombstones) posteriores al token (change_seq, id), en orden de cambio.
+    # Devuelve (items, has_more, próximo token como (change_seq, id))
+    tasks_version, purged_seq = (await session.execute(
+        select(User.tasks_version, User.tasks_purged_seq).where(User.id == user_id)
+    )).one()
+    if since[0] > 0 and since[0] <= purged_seq:
+        # se purgaron tombstones que el cliente no vio: tiene que resincronizar completo.
+        # Igual cuenta: un lote comparte change_seq y la página pudo cortar a mitad de él
+        # (el watermark solo guarda el seq, no el id)
+        raise ChangesExpired(user_id)
+    res = await session.execute(
+        select(Task)
+        .where(Task.user_id == user_id, tuple_(Task.change_seq, Task.id) > tuple_(*since))
+        .order_by(Task.change_seq, Task.id)
+        .limit(limit + 1)
+    )
+    items = res.scalars().all()
+    has_more = len(items) > limit
+    items = items[:limit]
+    next_key = (items[-1].change_seq, items[-1].id) if items else since
+    if not has_more:
+        # al día: el token salta al próximo change_seq (tasks_version se leyó antes que las filas).
+        # Si no, tras una purga el seq de la última fila viva puede quedar bajo el watermark
+        # y cada poll respondería 410 hasta la siguiente escritura
+        next_key = max(next_key, (tasks_version + 1, 0))
+    return items, has_more, next_key
+
+
+async def purge_tombstones(session: AsyncSession, older_than_days: int) -> int:
+    # borra físicamente tombstones viejos y recuerda hasta qué change_seq se purgó por usuario
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    purged = (await session.execute(
+        delete(Task).where(Task.deleted_at.is_not(None), Task.deleted_at < cutoff).returning(Task.user_id, Task.change_seq)
+    )).all()
+    watermarks: dict[int, int] = {}
+    for user_id, seq in purged:
+        watermarks[user_id] = max(seq, watermarks.get(user_id, 0))
+    for user_id, seq in watermarks.items():
+        await session.execute(
+            update(User)
+            .where(User.id == user_id, User.tasks_purged_seq < seq)
+            .values(tasks_purged_seq=seq)
+            .execution_options(synchronize_session=False)
+        )
+    await session.commit()
+    return len(purged)
+
+
+# ======= EXPORT / IMPORT =======
+
+async def stream_tasks(session: AsyncSession, user_id: int, columns: tuple, batch_size: int):
+    # cursor del lado del servidor: filas planas por bloques, sin entidades ORM ni identity map
+    stmt = select(*columns).where(*_live(user_id)).order_by(Task.id).execution_options(yield_per=batch_size)
+    result = await session.stream(stmt)
+    async for partition in result.partitions(batch_size):
+        yield partition
+
+
+async def import_tasks_rows(session: AsyncSession, user_id: int, rows: list[dict]) -> None:
+    # un lote del import en su propia transacción (executemany, sin RETURNING)
+    seq = await _begin_change(session, user_id)
+    await session.execute(insert(Task), [dict(row, user_id=user_id, change_seq=seq) for row in rows])
+    await _bump_stats(session, user_id, total=len(rows), completed=sum(bool(row.get("is_completed")) for row in rows))
+    await _finish_change(session, user_id)
+
+
+# ======= BATCH (una sola transacción por request) =======
+
+async def create_tasks_batch(session: AsyncSession, user_id: int, items: list[schemas.TaskCreate]):
+    seq = await _begin_change(session, user_id)
+    rows = [dict(item.model_dump(), user_id=user_id, change_seq=seq) for item in items]
+    # sort_by_parameter_order: el resultado i corresponde al item i (sin suponer cómo asigna ids el backend)
+    res = await session.execute(insert(Task).returning(Task, sort_by_parameter_order=True), rows)
+    tasks = res.scalars().all()
+    await _bump_stats(session, user_id, total=len(tasks), completed=sum(task.is_completed for task in tasks))
+    await _finish_change(session, user_id)
+    return [{"id": task.id, "status": "created", "task": task} for task in tasks]
+
+
+async def update_tasks_batch(session: AsyncSession, user_id: int, items: list[schemas.TaskBatchUpdateItem]):
+    # un id repetido combina sus cambios en orden (gana el último valor de cada campo), igual que
+    # aplicarlos uno tras otro; después los ids con los mismos cambios van en un solo UPDATE ... IN
+    merged: dict[int, dict] = {}
+    for item in items:
+        merged.setdefault(item.id, {}).update(_update_values(item))
+    groups: dict[tuple, list[int]] = {}
+    for task_id, values in merged.items():
+        groups.setdefault(tuple(sorted(values.items())), []).append(task_id)
+
+    seq = await _begin_change(session, user_id)
+    updated: dict[int, Task] = {}
+    changed = False
+    for values, ids in groups.items():
+        conditions = [*_live(user_id), Task.id.in_(ids)]
+        values = dict(values)
+        if not values:
+            res = await session.execute(select(Task).where(*conditions))
+        else:
+            if "is_completed" in values:
+                await _bump_stats(session, user_id, completed=await _completed_delta(session, conditions, values["is_completed"]))
+            res = await session.execute(
+                update(Task)
+                .where(*conditions)
+                .values(**values, version=Task.version + 1, change_seq=seq)
+                .returning(Task)
+                .execution_options(populate_existing=True)
+            )
+        for task in res.scalars().all():
+            updated[task.id] = task
+            changed = changed or bool(values)
+    await _finish_change(session, user_id, changed=changed)
+
+    return [
+        {"id": item.id, "status": "updated", "task": updated[item.id]}
+        if item.id in updated else {"id": item.id, "status": "not_found"}
+        for item in items
+    ]
+
+
+async def delete_tasks_batch(session: AsyncSession, user_id: int, ids: list[int]):
+    seq = await _begin_change(session, user_id)
+    res = await session.execute(
+        update(Task)
+        .where(*_live(user_id), Task.id.in_(ids))
+        .values(**_tombstone_values(seq))
+        .returning(Task.id, Task.is_completed)
+    )
+    rows = res.all()
+    deleted = {row.id for row in rows}
+    await _bump_stats(session, user_id, total=-len(rows), completed=-sum(row.is_completed for row in rows))
+    await _finish_change(session, user_id, changed=bool(deleted))
+    return [{"id": task_id, "status": "deleted" if task_id in deleted else "not_found"} for task_id in ids]
+
+
+# ======= ESTADÍSTICAS =======
+
+STATS_WEEK = timedelta(days=7)
+
+
+async def get_task_stats(session: AsyncSession, user_id: int) -> dict:
+    # total/completed salen de task_stats (O(1)); overdue y due_this_week dependen de la hora
+    # actual, así que no se pueden mantener como contador: se cuentan con un range scan sobre
+    # el índice parcial (user_id, is_completed, due_date, id), sin tocar la tabla
+    stats = (await session.execute(
+        select(TaskStats.total, TaskStats.completed).where(TaskStats.user_id == user_id)
+    )).one_or_none()
+    total, completed = stats if stats is not None else (0, 0)
+
+    now = datetime.now(timezone.utc)
+    overdue, due_this_week = (await session.execute(
+        select(
+            func.coalesce(func.sum(case((Task.due_date < now, 1), else_=0)), 0),
+            func.coalesce(func.sum(case((Task.due_date >= now, 1), else_=0)), 0),
+        ).where(*_live(user_id), Task.is_completed == False, Task.due_date < now + STATS_WEEK)  # noqa: E712
+    )).one()
+    return {
+        "total": total,
+        "completed": completed,
+        "pending": total - completed,
+        "overdue": overdue,
+        "due_this_week": due_this_week,
+    }
+
+
+async def rebuild_task_stats(session: AsyncSession) -> int:
+    # recalcula task_stats desde cero sin escrituras concurrentes de por medio:
+    # - PostgreSQL: FOR UPDATE sobre users espera a las escrituras en curso y frena las nuevas
+    #   (todas toman antes la fila del usuario en _begin_change) hasta el commit
+    # - SQLite: FOR UPDATE no existe; el DELETE toma el lock de escritura de la BD y fija la
+    #   sesión al writer, así que el recálculo lee en esa misma transacción
+    if not IS_SQLITE:
+        await session.execute(select(User.id).with_for_update())
+    await session.execute(delete(TaskStats))
+    res = await session.execute(insert(TaskStats).from_select(
+        ["user_id", "total", "completed"],
+        select(
+            User.id,
+            func.count(Task.id),
+            func.coalesce(func.sum(case((Task.is_completed, 1), else_=0)), 0),
+        )
+        .outerjoin(Task, and_(Task.user_id == User.id, Task.deleted_at.is_(None)))
+        .group_by(User.id),
+    ))
     await session.commit()
-    return True
+    return res.rowcount
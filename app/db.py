@@ -1,10 +1,112 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from sqlalchemy.orm import DeclarativeBase
+import os
+import time
 
-DATABASE_URL = "sqlite+aiosqlite:///./tasks.db"
+from sqlalchemy import Delete, Insert, Update, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.orm import DeclarativeBase, Session
+from sqlalchemy.pool import Pool, QueuePool
 
-engine = create_async_engine(DATABASE_URL, echo=False, future=True)
-SessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+from . import metrics
+
+# Perfil del engine configurable por entorno (SQLite por defecto, también sirve con postgresql+asyncpg://)
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./tasks.db")
+DB_ECHO = os.getenv("DB_ECHO", "0") == "1"
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+# PRAGMAs aplicados a cada conexión SQLite nueva
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": SQLITE_BUSY_TIMEOUT_MS,
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-20000")),  # negativo = KiB
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "temp_store": "MEMORY",
+}
+
+_url = make_url(DATABASE_URL)
+IS_SQLITE = _url.get_backend_name() == "sqlite"
+# cada conexión nueva a :memory: abre una BD vacía: todo pasa por una sola conexión compartida
+IS_SQLITE_MEMORY = IS_SQLITE and _url.database in (None, "", ":memory:")
+# con SQLite en archivo: un pool de lectura + un único writer serializado (una sola conexión)
+SPLIT_READ_WRITE = IS_SQLITE and not IS_SQLITE_MEMORY
+# pool que elige el dialecto para esta URL (StaticPool para :memory:, cola para el resto)
+DEFAULT_POOL_CLASS: type[Pool] = _url.get_dialect().get_pool_class(_url)
+
+
+def _apply_sqlite_pragmas(dbapi_connection, _record) -> None:
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+def _timed_pool(name: str) -> type[QueuePool]:
+    # mide cuánto espera cada checkout por una conexión libre
+    class TimedQueuePool(DEFAULT_POOL_CLASS):
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                metrics.observe_pool_wait(name, time.perf_counter() - start)
+
+    return TimedQueuePool
+
+
+def _create_engine(name: str, pool_size: int, max_overflow: int) -> AsyncEngine:
+    queued = issubclass(DEFAULT_POOL_CLASS, QueuePool)
+    if queued:
+        pool_args = {
+            "poolclass": _timed_pool(name),
+            "pool_size": pool_size,
+            "max_overflow": max_overflow,
+            "pool_timeout": DB_POOL_TIMEOUT,
+        }
+    else:
+        # se respeta el pool del dialecto (con :memory: otro pool abriría BDs vacías);
+        # StaticPool no acepta los parámetros de un pool con cola
+        pool_args = {}
+    new_engine = create_async_engine(DATABASE_URL, echo=DB_ECHO, pool_pre_ping=not IS_SQLITE, **pool_args)
+    if not queued:
+        # sin cola no hay espera por una conexión libre: cada checkout cuenta con espera 0
+        event.listen(new_engine.sync_engine.pool, "checkout", lambda *_: metrics.observe_pool_wait(name, 0.0))
+    if IS_SQLITE:
+        event.listen(new_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+    metrics.instrument_engine(new_engine, name)
+    return new_engine
+
+
+if SPLIT_READ_WRITE:
+    engine = _create_engine("writer", pool_size=1, max_overflow=0)
+    read_engine = _create_engine("reader", pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW)
+else:
+    engine = read_engine = _create_engine("default", pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW)
+
+
+class RoutingSession(Session):
+    # lecturas al pool de lectura; escrituras (y todo lo que siga en esa transacción) al writer
+    _writer_pinned = False
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if read_engine is engine:
+            return engine.sync_engine
+        if self._writer_pinned or self._flushing or isinstance(clause, (Insert, Update, Delete)):
+            self._writer_pinned = True
+            return engine.sync_engine
+        return read_engine.sync_engine
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _unpin_writer(session: RoutingSession, transaction) -> None:
+    if transaction.parent is None:
+        session._writer_pinned = False
+
+
+SessionLocal = async_sessionmaker(expire_on_commit=False, class_=AsyncSession, sync_session_class=RoutingSession)
 
 class Base(DeclarativeBase):
     pass
@@ -14,5 +116,13 @@ async def get_session() -> AsyncSession:
         yield session
 
 async def init_models():
+    # aplica las migraciones pendientes (o crea el esquema si la BD es nueva)
+    from .migrations import upgrade
+
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(upgrade)
+
+async def dispose_engines():
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
@@ -3,6 +3,7 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
+from . import user_cache
 from .db import get_session
 from .security import decode_token
 from .models import User
@@ -17,8 +18,14 @@ async def get_current_user(
     if not email:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
 
+    # el usuario resuelto se cachea por subject para evitar el SELECT en cada request
+    user = user_cache.get_user(email)
+    if user is not None:
+        return user
+
     res = await session.execute(select(User).where(User.email == email))
     user = res.scalar_one_or_none()
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    user_cache.set_user(user)
     return user
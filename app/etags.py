@@ -0,0 +1,83 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from .models import Task
+
+
+def task_etag(task: Task) -> str:
+    return f'"{task.id}-{task.version}"'
+
+
+class InvalidPrecondition(ValueError):
+    pass
+
+
+def parse_if_match(header: str | None, task_id: int) -> set[int] | None:
+    # devuelve las versiones aceptadas (el header puede ser una lista); None si no hay header o es "*".
+    # If-Match usa comparación fuerte (RFC 9110): un ETag débil nunca coincide, igual que
+    # uno de otra tarea; si ninguno puede coincidir la precondición falla
+    if header is None or header.strip() == "*":
+        return None
+    versions = set()
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/") or len(tag) < 2 or tag[0] != '"' or tag[-1] != '"':
+            continue
+        prefix, _, version = tag[1:-1].rpartition("-")
+        if prefix == str(task_id) and version.isdigit():
+            versions.add(int(version))
+    if not versions:
+        raise InvalidPrecondition(header)
+    return versions
+
+
+def list_etag(user_id: int, tasks_version: int) -> str:
+    # el mismo contador vale para cualquier URL de listado (los caches HTTP llaves por URL)
+    return f'W/"tasks-{user_id}-{tasks_version}"'
+
+
+def _matches(header: str, etag: str) -> bool:
+    # comparación débil (RFC 9110): se ignora el prefijo W/
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in candidates or etag.removeprefix("W/") in candidates
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)  # SQLite guarda UTC sin zona
+    return value.astimezone(timezone.utc)
+
+
+def http_date(value: datetime) -> str:
+    return format_datetime(_as_utc(value), usegmt=True)
+
+
+def _settled(last_modified: datetime) -> bool:
+    # Last-Modified (y tasks_changed_at en SQLite) tienen resolución de segundos: mientras
+    # dure el segundo del último cambio, otra escritura quedaría con la misma fecha
+    return _as_utc(last_modified).replace(microsecond=0) < datetime.now(timezone.utc).replace(microsecond=0)
+
+
+def last_modified(value: datetime | None) -> str | None:
+    # None mientras la fecha no sirva para validar (la validación queda solo con el ETag)
+    return http_date(value) if value is not None and _settled(value) else None
+
+
+def not_modified(
+    if_none_match: str | None,
+    if_modified_since: str | None,
+    etag: str,
+    last_modified: datetime | None,
+) -> bool:
+    # If-None-Match tiene prioridad; If-Modified-Since solo tiene resolución de segundos
+    if if_none_match is not None:
+        return _matches(if_none_match, etag)
+    if if_modified_since is None or last_modified is None or not _settled(last_modified):
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        return False
+    return _as_utc(last_modified).replace(microsecond=0) <= since
@@ -0,0 +1,132 @@
+import codecs
+import csv
+import io
+import json
+import os
+from datetime import datetime
+from typing import AsyncIterator, Literal
+
+from pydantic import ValidationError
+
+from . import crud, schemas
+from .db import SessionLocal
+from .models import Task
+
+ExportFormat = Literal["ndjson", "csv"]
+
+EXPORT_BATCH_SIZE = int(os.getenv("TASKS_EXPORT_BATCH_SIZE", "1000"))
+IMPORT_BATCH_SIZE = int(os.getenv("TASKS_IMPORT_BATCH_SIZE", "1000"))
+MAX_IMPORT_ERRORS = 100
+
+EXPORT_COLUMNS = (
+    Task.id, Task.title, Task.description, Task.is_completed,
+    Task.due_date, Task.created_at, Task.updated_at, Task.version,
+)
+FIELDNAMES = [col.key for col in EXPORT_COLUMNS]
+IMPORT_FIELDS = set(schemas.TaskCreate.model_fields)
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _encode_ndjson(rows) -> bytes:
+    return "".join(
+        json.dumps(dict(zip(FIELDNAMES, row)), default=_json_default, separators=(",", ":")) + "\n"
+        for row in rows
+    ).encode()
+
+
+def _encode_csv(rows, header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(FIELDNAMES)
+    writer.writerows(
+        [value.isoformat() if isinstance(value, datetime) else value for value in row] for row in rows
+    )
+    return buffer.getvalue().encode()
+
+
+async def iter_export(user_id: int, fmt: ExportFormat) -> AsyncIterator[bytes]:
+    # sesión propia: el StreamingResponse sigue leyendo después de que termina el endpoint
+    async with SessionLocal() as session:
+        if fmt == "csv":
+            yield _encode_csv([], header=True)
+        async for rows in crud.stream_tasks(session, user_id, EXPORT_COLUMNS, EXPORT_BATCH_SIZE):
+            yield _encode_ndjson(rows) if fmt == "ndjson" else _encode_csv(rows, header=False)
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    # líneas completas del body a medida que llega, sin cargarlo entero
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+async def _iter_records(chunks: AsyncIterator[bytes], fmt: ExportFormat) -> AsyncIterator[tuple[int, dict]]:
+    # (línea inicial, registro); un registro mal formado llega como {"__error__": ...}
+    line_no = 0
+    if fmt == "ndjson":
+        async for line in _iter_lines(chunks):
+            line_no += 1
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as exc:
+                record = {"__error__": f"Invalid JSON: {exc}"}
+            yield line_no, record if isinstance(record, dict) else {"__error__": "Expected a JSON object"}
+        return
+
+    header, record, start = None, "", 0
+    async for line in _iter_lines(chunks):
+        line_no += 1
+        if not record:
+            start = line_no
+        record = f"{record}\n{line}" if record else line
+        if record.count('"') % 2:
+            continue  # campo entre comillas con salto de línea: falta el resto
+        values = next(csv.reader([record]), [])
+        record = ""
+        if header is None:
+            header = values
+        elif values:
+            # celdas vacías = campo ausente (se usan los defaults de TaskCreate)
+            yield start, {key: value for key, value in zip(header, values) if value != ""}
+
+
+async def import_tasks(session, user_id: int, fmt: ExportFormat, chunks: AsyncIterator[bytes]) -> dict:
+    imported, errors, batch = 0, [], []
+    async for line_no, record in _iter_records(chunks, fmt):
+        try:
+            if "__error__" in record:
+                raise ValueError(record["__error__"])
+            task = schemas.TaskCreate.model_validate({k: v for k, v in record.items() if k in IMPORT_FIELDS})
+        except ValidationError as exc:
+            error = exc.errors()[0]
+            detail = f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}"
+        except ValueError as exc:
+            detail = str(exc)
+        else:
+            batch.append(task.model_dump())
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                await crud.import_tasks_rows(session, user_id, batch)
+                imported, batch = imported + len(batch), []
+            continue
+        if len(errors) < MAX_IMPORT_ERRORS:
+            errors.append({"line": line_no, "detail": detail})
+
+    if batch:
+        await crud.import_tasks_rows(session, user_id, batch)
+        imported += len(batch)
+    return {"imported": imported, "errors": errors}
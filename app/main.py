@@ -1,11 +1,17 @@
-from fastapi import FastAPI, Depends, HTTPException, Query, status
+from fastapi import FastAPI, Depends, Header, HTTPException, Query, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from .db import get_session, init_models
-from . import crud, schemas, auth_crud
+from .db import dispose_engines, get_session, init_models
+from . import crud, schemas, auth_crud, etags, export, metrics
+from .responses import FAST_LIST_RESPONSES, ORJSONResponse
 from .models import User
+from .pagination import (
+    InvalidCursor, TotalMode, decode_change_token, encode_change_token, get_cached_page, store_page,
+)
+from .security import HashingBusy
 from .deps import get_current_user
 
 app = FastAPI(title="Task Manager API", version="0.4.0")
@@ -15,27 +21,42 @@ app.add_middleware(
     allow_origins=["*"],
     allow_credentials=True, allow_methods=["*"], allow_headers=["*"],
 )
+app.add_middleware(metrics.MetricsMiddleware)
 
 @app.on_event("startup")
 async def on_startup():
     await init_models()
 
+@app.on_event("shutdown")
+async def on_shutdown():
+    await dispose_engines()
+
 @app.get("/healthz")
 async def healthz():
     return {"status": "ok"}
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def read_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 # ======= AUTH =======
 
 @app.post("/auth/register", response_model=schemas.UserOut, status_code=status.HTTP_201_CREATED)
 async def register(payload: schemas.UserCreate, session: AsyncSession = Depends(get_session)):
-    user = await auth_crud.register_user(session, payload)
+    try:
+        user = await auth_crud.register_user(session, payload)
+    except HashingBusy:
+        raise HTTPException(status_code=503, detail="Server busy, retry later", headers={"Retry-After": "1"})
     if user is None:
         raise HTTPException(status_code=400, detail="Email is already registered")
     return user
 
 @app.post("/auth/login", response_model=schemas.TokenResponse)
 async def login(form_data: OAuth2PasswordRequestForm = Depends(), session: AsyncSession = Depends(get_session)):
-    token_and_user = await auth_crud.login_user(session, form_data.username, form_data.password)
+    try:
+        token_and_user = await auth_crud.login_user(session, form_data.username, form_data.password)
+    except HashingBusy:
+        raise HTTPException(status_code=503, detail="Server busy, retry later", headers={"Retry-After": "1"})
     if token_and_user is None:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     token, _user = token_and_user
@@ -49,46 +70,210 @@ async def read_current_user(current_user: User = Depends(get_current_user)):
 
 @app.get("/tasks", response_model=schemas.TaskListOut)
 async def list_tasks(
+    request: Request,
     completed: bool | None = Query(default=None, description="Filtrar por completadas (true/false)"),
     limit: int = Query(default=10, ge=1, le=200),
     offset: int = Query(default=0, ge=0),
     order_by: crud.OrderBy = Query(default="due_date", description="due_date|created_at|title"),
     order_dir: str = Query(default="asc", pattern="^(asc|desc)$"),
+    cursor: str | None = Query(default=None, description="Cursor opaco (meta.next_cursor) de la página anterior"),
+    total: TotalMode = Query(default="exact", description="exact|cached|estimate|none"),
+    if_none_match: str | None = Header(default=None),
+    if_modified_since: str | None = Header(default=None),
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    if cursor and offset:
+        raise HTTPException(status_code=400, detail="Use either cursor or offset, not both")
+
+    # validación condicional con el contador del usuario, sin consultar la tabla tasks
+    tasks_version, changed_at = await crud.get_tasks_state(session, current_user.id)
+    headers = {"ETag": etags.list_etag(current_user.id, tasks_version), "Cache-Control": "private, no-cache"}
+    last_modified = etags.last_modified(changed_at)
+    if last_modified is not None:
+        headers["Last-Modified"] = last_modified
+    if etags.not_modified(if_none_match, if_modified_since, headers["ETag"], changed_at):
+        return Response(status_code=304, headers=headers)
+
+    query = str(request.url.query)
+    body = get_cached_page(current_user.id, tasks_version, query)
+    if body is not None:
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    try:
+        items, total_count, next_cursor = await crud.list_tasks(
+            session,
+            user_id=current_user.id,
+            completed=completed,
+            limit=limit,
+            offset=offset,
+            order_by=order_by,
+            order_dir=order_dir,
+            cursor=cursor,
+            total_mode=total,
+            rows=FAST_LIST_RESPONSES,
+        )
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    meta = {"total": total_count, "limit": limit, "offset": offset, "next_cursor": next_cursor}
+    if FAST_LIST_RESPONSES:
+        # filas de la BD ya confiables: se serializan directo, sin validar contra TaskListOut
+        response = ORJSONResponse({"items": items, "meta": meta}, headers=headers)
+        store_page(current_user.id, tasks_version, query, response.body)
+        return response
+    page = schemas.TaskListOut.model_validate({
+        "items": items,
+        "meta": meta,
+    })
+    body = page.model_dump_json().encode()
+    store_page(current_user.id, tasks_version, query, body)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.get("/tasks/search", response_model=schemas.TaskListOut)
+async def search_tasks(
+    q: str = Query(..., min_length=1, max_length=200, description="Texto a buscar en título y descripción"),
+    completed: bool | None = Query(default=None, description="Filtrar por completadas (true/false)"),
+    limit: int = Query(default=10, ge=1, le=200),
+    offset: int = Query(default=0, ge=0),
+    order_by: crud.SearchOrderBy = Query(default="relevance", description="relevance|due_date|created_at|title"),
+    order_dir: str = Query(default="asc", pattern="^(asc|desc)$"),
+    total: bool = Query(default=True, description="Calcular meta.total"),
     session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
-    items, total = await crud.list_tasks(
+    if not q.split():
+        raise HTTPException(status_code=400, detail="Empty search query")
+    items, total_count = await crud.search_tasks(
         session,
         user_id=current_user.id,
+        q=q,
         completed=completed,
         limit=limit,
         offset=offset,
         order_by=order_by,
         order_dir=order_dir,
+        with_total=total,
     )
-    return {"items": items, "meta": {"total": total, "limit": limit, "offset": offset}}
+    return {"items": items, "meta": {"total": total_count, "limit": limit, "offset": offset}}
+
+@app.get("/tasks/stats", response_model=schemas.TaskStatsOut)
+async def read_task_stats(session: AsyncSession = Depends(get_session), current_user: User = Depends(get_current_user)):
+    # contadores mantenidos en cada escritura: reemplaza los GET /tasks?limit=1 solo por meta.total
+    return await crud.get_task_stats(session, current_user.id)
+
+@app.get("/tasks/changes", response_model=schemas.TaskChangesOut)
+async def list_task_changes(
+    since: str | None = Query(default=None, description="Token next_since de la llamada anterior (vacío = todo)"),
+    limit: int = Query(default=200, ge=1, le=1000),
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    try:
+        since_key = decode_change_token(since) if since else (0, 0)
+        tasks, has_more, next_key = await crud.list_changes(session, current_user.id, since_key, limit)
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except crud.ChangesExpired:
+        raise HTTPException(status_code=410, detail="Change token expired, full resync required")
+
+    items = [
+        {"id": task.id, "deleted": True} if task.deleted_at is not None
+        else {"id": task.id, "deleted": False, "task": task}
+        for task in tasks
+    ]
+    return {"items": items, "next_since": encode_change_token(*next_key), "has_more": has_more}
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+@app.get("/tasks/export")
+async def export_tasks(
+    format: export.ExportFormat = Query(default="ndjson", description="ndjson|csv"),
+    current_user: User = Depends(get_current_user),
+):
+    return StreamingResponse(
+        export.iter_export(current_user.id, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="tasks.{format}"'},
+    )
+
+@app.post("/tasks/import", response_model=schemas.TaskImportResult)
+async def import_tasks(
+    request: Request,
+    format: export.ExportFormat = Query(default="ndjson", description="ndjson|csv"),
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    # el body se procesa en streaming y se inserta en lotes (una transacción por lote)
+    return await export.import_tasks(session, current_user.id, format, request.stream())
+
+# ======= TASKS en lote (antes de /tasks/{task_id}) =======
+
+@app.post("/tasks/batch", response_model=schemas.TaskBatchResult, status_code=201)
+async def create_tasks_batch(payload: schemas.TaskBatchCreate, session: AsyncSession = Depends(get_session), current_user: User = Depends(get_current_user)):
+    return {"items": await crud.create_tasks_batch(session, current_user.id, payload.items)}
+
+@app.patch("/tasks/batch", response_model=schemas.TaskBatchResult)
+async def update_tasks_batch(payload: schemas.TaskBatchUpdate, session: AsyncSession = Depends(get_session), current_user: User = Depends(get_current_user)):
+    return {"items": await crud.update_tasks_batch(session, current_user.id, payload.items)}
+
+@app.delete("/tasks/batch", response_model=schemas.TaskBatchResult)
+async def delete_tasks_batch(payload: schemas.TaskBatchDelete, session: AsyncSession = Depends(get_session), current_user: User = Depends(get_current_user)):
+    return {"items": await crud.delete_tasks_batch(session, current_user.id, payload.ids)}
 
 @app.get("/tasks/{task_id}", response_model=schemas.TaskOut)
-async def get_task(task_id: int, session: AsyncSession = Depends(get_session), current_user: User = Depends(get_current_user)):
+async def get_task(
+    task_id: int,
+    response: Response,
+    if_none_match: str | None = Header(default=None),
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
     task = await crud.get_task(session, current_user.id, task_id)
     if not task:
         raise HTTPException(404, detail="Task not found")
+    etag = etags.task_etag(task)
+    if etags.not_modified(if_none_match, None, etag, None):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
     return task
 
 @app.post("/tasks", response_model=schemas.TaskOut, status_code=201)
-async def create_task(payload: schemas.TaskCreate, session: AsyncSession = Depends(get_session), current_user: User = Depends(get_current_user)):
-    return await crud.create_task(session, current_user.id, payload)
+async def create_task(payload: schemas.TaskCreate, response: Response, session: AsyncSession = Depends(get_session), current_user: User = Depends(get_current_user)):
+    task = await crud.create_task(session, current_user.id, payload)
+    response.headers["ETag"] = etags.task_etag(task)
+    return task
 
 @app.patch("/tasks/{task_id}", response_model=schemas.TaskOut)
-async def update_task(task_id: int, payload: schemas.TaskUpdate, session: AsyncSession = Depends(get_session), current_user: User = Depends(get_current_user)):
-    task = await crud.update_task(session, current_user.id, task_id, payload)
+async def update_task(
+    task_id: int,
+    payload: schemas.TaskUpdate,
+    response: Response,
+    if_match: str | None = Header(default=None),
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    try:
+        expected_versions = etags.parse_if_match(if_match, task_id)
+        task = await crud.update_task(session, current_user.id, task_id, payload, expected_versions)
+    except (etags.InvalidPrecondition, crud.VersionConflict):
+        raise HTTPException(412, detail="If-Match precondition failed (task modified or deleted)")
     if not task:
         raise HTTPException(404, detail="Task not found")
+    response.headers["ETag"] = etags.task_etag(task)
     return task
 
 @app.delete("/tasks/{task_id}", status_code=204)
-async def delete_task(task_id: int, session: AsyncSession = Depends(get_session), current_user: User = Depends(get_current_user)):
-    ok = await crud.delete_task(session, current_user.id, task_id)
+async def delete_task(
+    task_id: int,
+    if_match: str | None = Header(default=None),
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    try:
+        expected_versions = etags.parse_if_match(if_match, task_id)
+        ok = await crud.delete_task(session, current_user.id, task_id, expected_versions)
+    except (etags.InvalidPrecondition, crud.VersionConflict):
+        raise HTTPException(412, detail="If-Match precondition failed (task modified or deleted)")
     if not ok:
         raise HTTPException(404, detail="Task not found")
     return None
@@ -0,0 +1,47 @@
+"""Tareas de mantenimiento de la BD.
+
+Uso: python -m app.maintenance purge-tombstones [--days 30]
+     python -m app.maintenance rebuild-stats
+"""
+import argparse
+import asyncio
+
+from . import crud
+from .db import SessionLocal, dispose_engines, init_models
+
+
+async def _purge_tombstones(days: int) -> None:
+    async with SessionLocal() as session:
+        purged = await crud.purge_tombstones(session, older_than_days=days)
+    print(f"purged {purged} tombstones older than {days} days")
+
+
+async def _rebuild_stats() -> None:
+    async with SessionLocal() as session:
+        users = await crud.rebuild_task_stats(session)
+    print(f"rebuilt task stats for {users} users")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.maintenance", description=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+    purge = commands.add_parser("purge-tombstones", help="borra tombstones viejos de /tasks/changes")
+    purge.add_argument("--days", type=int, default=30)
+    commands.add_parser("rebuild-stats", help="recalcula desde cero los contadores de /tasks/stats")
+    args = parser.parse_args()
+
+    async def run() -> None:
+        await init_models()
+        try:
+            if args.command == "purge-tombstones":
+                await _purge_tombstones(args.days)
+            elif args.command == "rebuild-stats":
+                await _rebuild_stats()
+        finally:
+            await dispose_engines()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
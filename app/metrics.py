@@ -0,0 +1,212 @@
+import logging
+import os
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from threading import Lock
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# métricas en formato texto de Prometheus, sin dependencias externas
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "0"))  # 0 = log de requests lentos desactivado
+MAX_LOGGED_STATEMENTS = 50
+
+slow_log = logging.getLogger("app.slow_requests")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = dict(self._values)
+        return super().render() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in values.items()
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # por label set: [conteo por bucket..., +Inf], suma
+        self._values: dict[tuple[str, ...], tuple[list[int], float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+        lines = super().render()
+        for key, (counts, total) in values.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+REGISTRY: list[_Metric] = []
+
+http_request_seconds = Histogram(
+    "http_request_duration_seconds", "Latencia de requests HTTP por ruta", ("method", "route", "status"),
+)
+http_in_flight = Gauge("http_requests_in_flight", "Requests HTTP en curso")
+sql_statements_per_request = Histogram(
+    "sql_statements_per_request", "Sentencias SQL ejecutadas por request", ("route",), buckets=COUNT_BUCKETS,
+)
+sql_seconds_per_request = Histogram("sql_duration_seconds_per_request", "Tiempo en SQL por request", ("route",))
+sql_statements_total = Counter("sql_statements_total", "Sentencias SQL ejecutadas", ("engine",))
+db_pool_wait_seconds = Histogram("db_pool_wait_seconds", "Espera para obtener una conexión del pool", ("engine",))
+password_hash_seconds = Histogram("password_hash_duration_seconds", "Tiempo de hashing/verificación de passwords")
+
+
+def render() -> str:
+    lines: list[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ======= estadísticas por request =======
+
+@dataclass
+class RequestStats:
+    statements: int = 0
+    sql_seconds: float = 0.0
+    hash_seconds: float = 0.0
+    sql: list[str] = field(default_factory=list)
+
+
+_current: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+def current_stats() -> RequestStats | None:
+    return _current.get()
+
+
+def instrument_engine(engine: AsyncEngine, name: str) -> None:
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        sql_statements_total.inc(engine=name)
+        stats = _current.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.sql_seconds += elapsed
+            if SLOW_REQUEST_MS > 0 and len(stats.sql) < MAX_LOGGED_STATEMENTS:
+                stats.sql.append(f"[{elapsed * 1000:.1f}ms] {statement}")
+
+
+def observe_pool_wait(engine_name: str, seconds: float) -> None:
+    db_pool_wait_seconds.observe(seconds, engine=engine_name)
+
+
+def observe_password_hash(seconds: float) -> None:
+    password_hash_seconds.observe(seconds)
+
+
+class MetricsMiddleware:
+    # middleware ASGI puro: latencia por ruta, requests en curso y SQL por request
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", (
+                    f'db;dur={stats.sql_seconds * 1000:.1f};desc="{stats.statements} queries"'
+                ).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_in_flight.dec()
+            _current.reset(token)
+            elapsed = time.perf_counter() - start
+            route = getattr(scope.get("route"), "path", "unmatched")
+            http_request_seconds.observe(elapsed, method=scope["method"], route=route, status=str(status_code))
+            sql_statements_per_request.observe(stats.statements, route=route)
+            sql_seconds_per_request.observe(stats.sql_seconds, route=route)
+            if SLOW_REQUEST_MS > 0 and elapsed * 1000 >= SLOW_REQUEST_MS:
+                slow_log.warning(
+                    "slow request %s %s %.1fms status=%s sql=%d (%.1fms) hash=%.1fms\n%s",
+                    scope["method"], route, elapsed * 1000, status_code, stats.statements,
+                    stats.sql_seconds * 1000, stats.hash_seconds * 1000, "\n".join(stats.sql),
+                )
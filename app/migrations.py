@@ -0,0 +1,156 @@
+from typing import Callable
+
+from sqlalchemy import Connection, inspect, text
+
+from .db import Base
+from . import models  # noqa: F401  (registra las tablas en Base.metadata)
+
+# Cada migración es (versión, descripción, función síncrona que recibe la Connection).
+# Deben ser idempotentes: una BD creada con el create_all original arranca en la versión 1
+# y una BD nueva corre todas después del create_all (para lo que no vive en Base.metadata).
+Migration = tuple[int, str, Callable[[Connection], None]]
+
+
+def _create_task_listing_indexes(conn: Connection) -> None:
+    # DDL congelado en su versión original (la 6 los reemplaza por índices parciales)
+    for name, columns in (
+        ("ix_tasks_user_due_date", "user_id, due_date, id"),
+        ("ix_tasks_user_created_at", "user_id, created_at, id"),
+        ("ix_tasks_user_title", "user_id, title, id"),
+        ("ix_tasks_user_completed_due_date", "user_id, is_completed, due_date, id"),
+        ("ix_tasks_user_completed_created_at", "user_id, is_completed, created_at, id"),
+        ("ix_tasks_user_completed_title", "user_id, is_completed, title, id"),
+    ):
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON tasks ({columns})"))
+    # cubierto por los índices compuestos que empiezan con user_id
+    conn.execute(text("DROP INDEX IF EXISTS ix_tasks_user_id"))
+
+
+def _add_task_version(conn: Connection) -> None:
+    columns = {c["name"] for c in inspect(conn).get_columns("tasks")}
+    if "version" not in columns:
+        conn.execute(text("ALTER TABLE tasks ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
+
+
+def _create_task_search_index(conn: Connection) -> None:
+    # FTS5 sin contenido (content=''): los triggers le pasan los valores de tasks.
+    # "owner" indexa el token u<user_id> para que el filtro por usuario ocurra dentro del índice
+    if conn.dialect.name != "sqlite":
+        return
+    exists = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'tasks_fts'")).first()
+    for statement in (
+        """CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+            title, description, owner, content='',
+            tokenize='unicode61 remove_diacritics 2'
+        )""",
+        """CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN
+            INSERT INTO tasks_fts(rowid, title, description, owner)
+            VALUES (new.id, new.title, new.description, 'u' || new.user_id);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN
+            INSERT INTO tasks_fts(tasks_fts, rowid, title, description, owner)
+            VALUES ('delete', old.id, old.title, old.description, 'u' || old.user_id);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF title, description, user_id ON tasks BEGIN
+            INSERT INTO tasks_fts(tasks_fts, rowid, title, description, owner)
+            VALUES ('delete', old.id, old.title, old.description, 'u' || old.user_id);
+            INSERT INTO tasks_fts(rowid, title, description, owner)
+            VALUES (new.id, new.title, new.description, 'u' || new.user_id);
+        END""",
+    ):
+        conn.execute(text(statement))
+    if not exists:
+        conn.execute(text(
+            "INSERT INTO tasks_fts(rowid, title, description, owner) "
+            "SELECT id, title, description, 'u' || user_id FROM tasks"
+        ))
+
+
+def _add_user_tasks_version(conn: Connection) -> None:
+    columns = {c["name"] for c in inspect(conn).get_columns("users")}
+    if "tasks_version" not in columns:
+        conn.execute(text("ALTER TABLE users ADD COLUMN tasks_version INTEGER NOT NULL DEFAULT 0"))
+    if "tasks_changed_at" not in columns:
+        conn.execute(text("ALTER TABLE users ADD COLUMN tasks_changed_at DATETIME"))
+
+
+def _add_task_change_tracking(conn: Connection) -> None:
+    columns = {c["name"] for c in inspect(conn).get_columns("tasks")}
+    if "updated_at" not in columns:
+        conn.execute(text("ALTER TABLE tasks ADD COLUMN updated_at DATETIME"))
+        conn.execute(text("UPDATE tasks SET updated_at = created_at"))
+    if "deleted_at" not in columns:
+        conn.execute(text("ALTER TABLE tasks ADD COLUMN deleted_at DATETIME"))
+    if "change_seq" not in columns:
+        conn.execute(text("ALTER TABLE tasks ADD COLUMN change_seq INTEGER NOT NULL DEFAULT 0"))
+    user_columns = {c["name"] for c in inspect(conn).get_columns("users")}
+    if "tasks_purged_seq" not in user_columns:
+        conn.execute(text("ALTER TABLE users ADD COLUMN tasks_purged_seq INTEGER NOT NULL DEFAULT 0"))
+
+    # los índices de listado pasan a ser parciales (WHERE deleted_at IS NULL)
+    for index in models.Task.__table__.indexes:
+        if index.name == "ix_tasks_user_change_seq":
+            index.create(conn, checkfirst=True)
+        elif index.name.startswith("ix_tasks_user_"):
+            conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+            index.create(conn)
+
+
+def _create_task_stats(conn: Connection) -> None:
+    models.TaskStats.__table__.create(conn, checkfirst=True)
+    # cuenta inicial para los usuarios que todavía no tienen fila
+    conn.execute(text(
+        "INSERT INTO task_stats (user_id, total, completed) "
+        "SELECT users.id, COUNT(tasks.id), COALESCE(SUM(CASE WHEN tasks.is_completed THEN 1 ELSE 0 END), 0) "
+        "FROM users LEFT JOIN tasks ON tasks.user_id = users.id AND tasks.deleted_at IS NULL "
+        "WHERE users.id NOT IN (SELECT user_id FROM task_stats) "
+        "GROUP BY users.id"
+    ))
+
+
+def _backfill_task_updated_at(conn: Connection) -> None:
+    # filas insertadas en BDs migradas antes de que updated_at tuviera default del lado del cliente
+    conn.execute(text("UPDATE tasks SET updated_at = created_at WHERE updated_at IS NULL"))
+
+
+MIGRATIONS: list[Migration] = [
+    (2, "composite indexes for task listing", _create_task_listing_indexes),
+    (3, "tasks.version for optimistic concurrency", _add_task_version),
+    (4, "FTS5 search index over task title/description", _create_task_search_index),
+    (5, "per-user task change counter", _add_user_tasks_version),
+    (6, "tasks.updated_at, tombstones and change_seq for delta sync", _add_task_change_tracking),
+    (7, "per-user task_stats counters", _create_task_stats),
+    (8, "backfill tasks.updated_at left NULL on migrated databases", _backfill_task_updated_at),
+]
+
+HEAD = MIGRATIONS[-1][0] if MIGRATIONS else 1
+
+
+def _set_version(conn: Connection, version: int) -> None:
+    conn.execute(text("DELETE FROM schema_version"))
+    conn.execute(text("INSERT INTO schema_version (version) VALUES (:v)"), {"v": version})
+
+
+def current_version(conn: Connection) -> int | None:
+    tables = inspect(conn).get_table_names()
+    if "schema_version" in tables:
+        return conn.execute(text("SELECT version FROM schema_version")).scalar_one_or_none() or 1
+    # BD anterior al sistema de migraciones (solo create_all)
+    return 1 if "tasks" in tables else None
+
+
+def upgrade(conn: Connection) -> int:
+    version = current_version(conn)
+    conn.execute(text("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)"))
+
+    if version is None:
+        # BD nueva: create_all y luego todas las migraciones (son idempotentes)
+        Base.metadata.create_all(conn)
+        version = 1
+
+    for target, _description, step in MIGRATIONS:
+        if target > version:
+            step(conn)
+            version = target
+            _set_version(conn, version)
+    return version
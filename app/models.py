@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 from sqlalchemy import (
-    String, Boolean, DateTime, func, Integer, ForeignKey
+    String, Boolean, DateTime, func, Integer, ForeignKey, Index, text
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .db import Base
@@ -15,12 +15,33 @@ class User(Base):
     hashed_password: Mapped[str] = mapped_column(String(255))
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # contador de cambios en las tareas del usuario (ETag / Last-Modified de los listados)
+    tasks_version: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    tasks_changed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # hasta qué change_seq se purgaron tombstones (un "since" menor obliga a resincronizar)
+    tasks_purged_seq: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
 
     tasks: Mapped[list["Task"]] = relationship(back_populates="user", cascade="all, delete-orphan")
 
 
 class Task(Base):
     __tablename__ = "tasks"
+    # índices compuestos para el listado: filtro por dueño (+ completada) y orden por (columna, id);
+    # parciales para que los tombstones no ocupen lugar en el camino caliente
+    __table_args__ = tuple(
+        Index(name, *columns, sqlite_where=text("deleted_at IS NULL"), postgresql_where=text("deleted_at IS NULL"))
+        for name, columns in (
+            ("ix_tasks_user_due_date", ("user_id", "due_date", "id")),
+            ("ix_tasks_user_created_at", ("user_id", "created_at", "id")),
+            ("ix_tasks_user_title", ("user_id", "title", "id")),
+            ("ix_tasks_user_completed_due_date", ("user_id", "is_completed", "due_date", "id")),
+            ("ix_tasks_user_completed_created_at", ("user_id", "is_completed", "created_at", "id")),
+            ("ix_tasks_user_completed_title", ("user_id", "is_completed", "title", "id")),
+        )
+    ) + (
+        # delta sync: cambios del usuario en orden de change_seq (incluye tombstones)
+        Index("ix_tasks_user_change_seq", "user_id", "change_seq", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     title: Mapped[str] = mapped_column(String(200))
@@ -28,7 +49,26 @@ class Task(Base):
     is_completed: Mapped[bool] = mapped_column(Boolean, default=False, index=True)
     due_date: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # se incrementa en cada UPDATE (concurrencia optimista vía ETag / If-Match)
+    version: Mapped[int] = mapped_column(Integer, default=1, server_default="1")
+    # default también del lado del cliente: en BDs migradas la columna se agregó con ALTER TABLE
+    # sin DEFAULT, así que el server_default solo existe en esquemas nuevos
+    updated_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), default=func.now(), server_default=func.now(), onupdate=func.now(), nullable=True
+    )
+    # borrado lógico (tombstone) y número de cambio monotónico por usuario (users.tasks_version)
+    deleted_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    change_seq: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
 
     # dueño de la tarea
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
     user: Mapped["User"] = relationship(back_populates="tasks")
+
+
+class TaskStats(Base):
+    __tablename__ = "task_stats"
+    # contadores de /tasks/stats (solo tareas vivas), se actualizan en la misma transacción que
+    # cada escritura de tasks; "python -m app.maintenance rebuild-stats" los recalcula
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    total: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    completed: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
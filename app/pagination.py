@@ -0,0 +1,100 @@
+import base64
+import json
+import os
+from datetime import datetime
+from typing import Any, Literal
+
+from .cache import TTLCache
+
+# exact: count() en cada página | cached: count() memoizado e invalidado en escrituras
+# estimate: último count() conocido aunque esté desactualizado | none: sin total
+TotalMode = Literal["exact", "cached", "estimate", "none"]
+
+TOTAL_CACHE_TTL = float(os.getenv("TASKS_TOTAL_CACHE_TTL", "30"))
+TOTAL_CACHE_SIZE = int(os.getenv("TASKS_TOTAL_CACHE_SIZE", "10000"))
+
+# (user_id, completed) -> (total, stale)
+_totals = TTLCache(maxsize=TOTAL_CACHE_SIZE, ttl=TOTAL_CACHE_TTL)
+
+# páginas de GET /tasks ya serializadas; la llave incluye el contador de cambios del
+# usuario, así que cualquier escritura las invalida. TTL 0 = desactivado
+PAGE_CACHE_TTL = float(os.getenv("TASKS_PAGE_CACHE_TTL", "5"))
+PAGE_CACHE_SIZE = int(os.getenv("TASKS_PAGE_CACHE_SIZE", "2000"))
+_pages = TTLCache(maxsize=PAGE_CACHE_SIZE, ttl=PAGE_CACHE_TTL)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(order_by: str, order_dir: str, value: Any, task_id: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps({"o": order_by, "d": order_dir, "v": value, "id": task_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, order_by: str, order_dir: str) -> tuple[Any, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value, task_id = data["v"], int(data["id"])
+        if data["o"] != order_by or data["d"] != order_dir:
+            raise InvalidCursor("Cursor does not match order_by/order_dir")
+        # el cursor no va firmado: el valor llega a la consulta, así que se valida su tipo
+        if value is None:
+            if order_by != "due_date":  # la única columna de orden que admite NULL
+                raise InvalidCursor("Malformed cursor")
+        elif not isinstance(value, str):
+            raise InvalidCursor("Malformed cursor")
+        elif order_by in ("due_date", "created_at"):
+            value = datetime.fromisoformat(value)
+    except InvalidCursor:
+        raise
+    except (ValueError, KeyError, TypeError) as exc:
+        raise InvalidCursor("Malformed cursor") from exc
+    return value, task_id
+
+
+def get_cached_total(user_id: int, completed: bool | None, allow_stale: bool) -> int | None:
+    entry = _totals.get((user_id, completed))
+    if entry is None:
+        return None
+    total, stale = entry
+    if stale and not allow_stale:
+        return None
+    return total
+
+
+def store_total(user_id: int, completed: bool | None, total: int) -> None:
+    _totals.set((user_id, completed), (total, False))
+
+
+def invalidate_totals(user_id: int) -> None:
+    # se marcan como viejos en lugar de borrarlos: "estimate" los sigue usando
+    for completed in (None, True, False):
+        entry = _totals.get((user_id, completed))
+        if entry is not None:
+            _totals.set((user_id, completed), (entry[0], True))
+
+
+def get_cached_page(user_id: int, tasks_version: int, query: str) -> bytes | None:
+    if PAGE_CACHE_TTL <= 0:
+        return None
+    return _pages.get((user_id, tasks_version, query))
+
+
+def store_page(user_id: int, tasks_version: int, query: str, body: bytes) -> None:
+    if PAGE_CACHE_TTL > 0:
+        _pages.set((user_id, tasks_version, query), body)
+
+
+def encode_change_token(change_seq: int, task_id: int) -> str:
+    return f"{change_seq}.{task_id}"
+
+
+def decode_change_token(token: str) -> tuple[int, int]:
+    seq, _, task_id = token.partition(".")
+    if not seq.isdigit() or not task_id.isdigit():
+        raise InvalidCursor("Malformed change token")
+    return int(seq), int(task_id)
@@ -0,0 +1,33 @@
+import json
+import os
+from datetime import date, datetime
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # dependencia opcional: sin orjson se usa json de la stdlib
+    orjson = None
+
+# GET /tasks serializa filas planas sin pasar por Pydantic (opt-in)
+FAST_LIST_RESPONSES = os.getenv("TASKS_FAST_LIST", "0") == "1"
+
+
+def _default(value: Any):
+    if isinstance(value, (datetime, date)):
+        # mismo formato que Pydantic: ISO 8601 con "Z" para UTC
+        return value.isoformat().replace("+00:00", "Z")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class ORJSONResponse(JSONResponse):
+    # para datos ya confiables (filas de la BD): no valida, solo serializa
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,5 +1,9 @@
 from pydantic import BaseModel, Field, EmailStr
 from datetime import datetime
+from typing import Literal
+
+# máximo de operaciones por request en los endpoints /tasks/batch
+MAX_BATCH_ITEMS = 500
 
 # =========================
 # TASK SCHEMAS
@@ -23,21 +27,73 @@ class TaskUpdate(BaseModel):
 class TaskOut(TaskBase):
     id: int
     created_at: datetime
+    updated_at: datetime | None = None
+    version: int
 
     class Config:
         from_attributes = True
 
 
 class PageMeta(BaseModel):
-    total: int
+    total: int | None
     limit: int
     offset: int
+    next_cursor: str | None = None
 
 class TaskListOut(BaseModel):
     items: list[TaskOut]
     meta: PageMeta
 
 
+class TaskStatsOut(BaseModel):
+    total: int
+    completed: int
+    pending: int
+    overdue: int         # pendientes con due_date ya vencida
+    due_this_week: int   # pendientes que vencen en los próximos 7 días
+
+
+class TaskChange(BaseModel):
+    id: int
+    deleted: bool
+    task: TaskOut | None = None
+
+class TaskChangesOut(BaseModel):
+    items: list[TaskChange]
+    next_since: str   # token opaco para la siguiente llamada a /tasks/changes
+    has_more: bool
+
+
+class TaskImportError(BaseModel):
+    line: int
+    detail: str
+
+class TaskImportResult(BaseModel):
+    imported: int
+    errors: list[TaskImportError]
+
+
+class TaskBatchCreate(BaseModel):
+    items: list[TaskCreate] = Field(..., min_length=1, max_length=MAX_BATCH_ITEMS)
+
+class TaskBatchUpdateItem(TaskUpdate):
+    id: int
+
+class TaskBatchUpdate(BaseModel):
+    items: list[TaskBatchUpdateItem] = Field(..., min_length=1, max_length=MAX_BATCH_ITEMS)
+
+class TaskBatchDelete(BaseModel):
+    ids: list[int] = Field(..., min_length=1, max_length=MAX_BATCH_ITEMS)
+
+class TaskBatchItemResult(BaseModel):
+    id: int
+    status: Literal["created", "updated", "deleted", "not_found"]
+    task: TaskOut | None = None
+
+class TaskBatchResult(BaseModel):
+    items: list[TaskBatchItemResult]
+
+
 # =========================
 # AUTH / USER SCHEMAS
 # =========================
@@ -1,22 +1,92 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Callable, Optional, TypeVar
 from jose import jwt, JWTError
-from passlib.hash import pbkdf2_sha256
+from passlib.context import CryptContext
+
+from . import metrics
+from .cache import TTLCache
 
 # En producción, SECRET_KEY debería venir de variables de entorno
 SECRET_KEY = "CHANGE_ME_IN_PRODUCTION"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60  # 1 hora
 
+# tokens ya verificados -> subject; nunca se guardan más allá de su "exp"
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", "300"))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+_token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL)
+
+# hashes con menos rondas que HASH_ROUNDS se re-hashean de forma transparente en el login
+HASH_ROUNDS = int(os.getenv("HASH_ROUNDS", "29000"))
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256"],
+    pbkdf2_sha256__default_rounds=HASH_ROUNDS,
+    pbkdf2_sha256__min_rounds=HASH_ROUNDS,
+)
+
+# el hashing corre fuera del event loop (hashlib libera el GIL); lo que exceda
+# workers + cola se rechaza de inmediato en lugar de acumularse
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", "2"))
+HASH_QUEUE_DEPTH = int(os.getenv("HASH_QUEUE_DEPTH", "32"))
+_hash_pool = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="pwhash")
+_hash_slots = threading.BoundedSemaphore(HASH_WORKERS + HASH_QUEUE_DEPTH)
+
+T = TypeVar("T")
+
+
+class HashingBusy(RuntimeError):
+    pass
+
 
 def hash_password(plain_password: str) -> str:
     # genera un hash seguro usando pbkdf2_sha256
-    return pbkdf2_sha256.hash(plain_password)
+    return pwd_context.hash(plain_password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     # compara password en texto plano contra hash guardado
-    return pbkdf2_sha256.verify(plain_password, hashed_password)
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    # devuelve (válido, nuevo_hash) donde nuevo_hash != None si los parámetros quedaron viejos
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def _timed(fn: Callable[..., T], *args) -> T:
+    start = time.perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        metrics.observe_password_hash(time.perf_counter() - start)
+
+
+async def _run_in_hash_pool(fn: Callable[..., T], *args) -> T:
+    if not _hash_slots.acquire(blocking=False):
+        raise HashingBusy("Too many password hashing requests in flight")
+    start = time.perf_counter()
+    future = _hash_pool.submit(_timed, fn, *args)
+    # el slot se libera cuando termina el trabajo, aunque el request se cancele antes
+    future.add_done_callback(lambda _f: _hash_slots.release())
+    try:
+        return await asyncio.wrap_future(future)
+    finally:
+        stats = metrics.current_stats()
+        if stats is not None:
+            stats.hash_seconds += time.perf_counter() - start
+
+
+async def hash_password_async(plain_password: str) -> str:
+    return await _run_in_hash_pool(hash_password, plain_password)
+
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    return await _run_in_hash_pool(verify_and_update_password, plain_password, hashed_password)
 
 
 def create_access_token(subject: str, expires_minutes: int = ACCESS_TOKEN_EXPIRE_MINUTES) -> str:
@@ -26,8 +96,17 @@ def create_access_token(subject: str, expires_minutes: int = ACCESS_TOKEN_EXPIRE
 
 
 def decode_token(token: str) -> Optional[str]:
+    subject = _token_cache.get(token)
+    if subject is not None:
+        return subject
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload.get("sub")
     except JWTError:
         return None
+    subject = payload.get("sub")
+    exp = payload.get("exp")
+    if subject is not None and exp is not None:
+        remaining = exp - time.time()
+        if remaining > 0:
+            _token_cache.set(token, subject, ttl=min(TOKEN_CACHE_TTL, remaining))
+    return subject
@@ -0,0 +1,117 @@
+import os
+from datetime import datetime
+from typing import Any, Protocol
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from .cache import TTLCache
+from .models import User
+
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "30"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+
+
+class UserCacheBackend(Protocol):
+    # backend compartido (p. ej. Redis) que guarda snapshots serializables por subject (email)
+    def get(self, key: str) -> dict[str, Any] | None: ...
+    def set(self, key: str, value: dict[str, Any], ttl: float) -> None: ...
+    def delete(self, key: str) -> None: ...
+
+
+class InMemoryUserCacheBackend:
+    # stand-in en memoria del backend compartido (útil en tests): respeta el ttl de cada
+    # set y está acotado, como lo estaría el backend real
+    def __init__(self, maxsize: int = USER_CACHE_SIZE):
+        self._data = TTLCache(maxsize=maxsize, ttl=USER_CACHE_TTL)
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        return self._data.get(key)
+
+    def set(self, key: str, value: dict[str, Any], ttl: float) -> None:
+        self._data.set(key, value, ttl)
+
+    def delete(self, key: str) -> None:
+        self._data.pop(key)
+
+
+_local = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+_shared: UserCacheBackend | None = None
+
+
+def set_backend(backend: UserCacheBackend | None) -> None:
+    global _shared
+    _shared = backend
+    _local.clear()
+
+
+def _snapshot(user: User) -> dict[str, Any]:
+    # sin hashed_password: el cache solo sirve para autorizar requests
+    return {
+        "id": user.id,
+        "email": user.email,
+        "is_active": user.is_active,
+        "created_at": user.created_at.isoformat() if user.created_at else None,
+    }
+
+
+def _from_snapshot(data: dict[str, Any]) -> User:
+    # objeto transitorio (no ligado a ninguna sesión); solo para lectura
+    created_at = data["created_at"]
+    return User(
+        id=data["id"],
+        email=data["email"],
+        is_active=data["is_active"],
+        created_at=datetime.fromisoformat(created_at) if created_at else None,
+    )
+
+
+def get_user(email: str) -> User | None:
+    # con backend compartido no hay capa local: una invalidación en otro worker
+    # (p. ej. desactivar al usuario) no llegaría a las copias locales de este
+    data = _shared.get(email) if _shared is not None else _local.get(email)
+    return _from_snapshot(data) if data is not None else None
+
+
+def set_user(user: User) -> None:
+    data = _snapshot(user)
+    if _shared is not None:
+        _shared.set(user.email, data, USER_CACHE_TTL)
+    else:
+        _local.set(user.email, data)
+
+
+def invalidate(email: str) -> None:
+    _local.pop(email)
+    if _shared is not None:
+        _shared.delete(email)
+
+
+_PENDING_KEY = "user_cache_invalidations"
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_on_change(_mapper, _connection, target: User) -> None:
+    # cualquier cambio vía ORM (desactivar, cambiar email, etc.) invalida el cache, pero recién
+    # después del commit: durante el flush otra request todavía leería la fila vieja y la re-cachearía
+    session = object_session(target)
+    emails = {target.email, *(inspect(target).attrs.email.history.deleted or ())}
+    if session is None:
+        for email in emails:
+            invalidate(email)
+        return
+    session.info.setdefault(_PENDING_KEY, set()).update(emails)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    for email in session.info.pop(_PENDING_KEY, ()):
+        invalidate(email)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_after_rollback(session: Session, _previous_transaction) -> None:
+    # los cambios no llegaron a la BD: lo cacheado sigue siendo válido
+    if not session.in_transaction():
+        session.info.pop(_PENDING_KEY, None)
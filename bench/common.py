@@ -0,0 +1,76 @@
+import random
+import sqlite3
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+
+WORDS = (
+    "comprar leche pagar renta llamar doctor revisar correo enviar reporte preparar junta "
+    "lavar auto regar plantas estudiar examen reservar vuelo renovar pasaporte arreglar bug "
+    "desplegar api escribir tests limpiar cocina cita dentista cancelar suscripcion"
+).split()
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def seed_database(
+    path: str,
+    n_users: int,
+    tasks_per_user: int,
+    hashed_password: str = "x",
+    seed: int = 42,
+) -> None:
+    """Crea el esquema con las migraciones de la app y siembra usuarios/tareas con sqlite3.
+
+    Las tareas de cada usuario quedan con ids contiguos: el usuario u (1..n) tiene
+    los ids (u - 1) * tasks_per_user + 1 .. u * tasks_per_user.
+    """
+    from app.migrations import upgrade
+
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        upgrade(conn)
+    engine.dispose()
+
+    rng = random.Random(seed)
+    # vocabulario con cola larga para que la selectividad se parezca a datos reales
+    vocabulary = WORDS + [f"{rng.choice(WORDS)[:4]}{i}" for i in range(20_000)]
+    base = datetime(2026, 1, 1)
+    db = sqlite3.connect(path)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=OFF")
+    db.executemany(
+        "INSERT INTO users (id, email, hashed_password, is_active) VALUES (?, ?, ?, 1)",
+        [(u, f"user{u}@bench.local", hashed_password) for u in range(1, n_users + 1)],
+    )
+    for user_id in range(1, n_users + 1):
+        rows = [
+            (
+                " ".join(rng.choices(vocabulary, k=3)),
+                " ".join(rng.choices(vocabulary, k=12)),
+                rng.random() < 0.3,
+                None if rng.random() < 0.2 else (base + timedelta(hours=rng.randint(0, 24 * 365))).isoformat(" "),
+                (base - timedelta(minutes=rng.randint(0, 60 * 24 * 365))).isoformat(" "),
+                user_id,
+            )
+            for _ in range(tasks_per_user)
+        ]
+        db.executemany(
+            "INSERT INTO tasks (title, description, is_completed, due_date, created_at, user_id) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        db.commit()
+    # el seed no pasa por crud: los contadores de /tasks/stats se calculan al final
+    db.execute(
+        "INSERT INTO task_stats (user_id, total, completed) "
+        "SELECT user_id, COUNT(*), SUM(is_completed) FROM tasks GROUP BY user_id"
+    )
+    db.commit()
+    db.execute("ANALYZE")
+    db.close()
@@ -0,0 +1,81 @@
+"""GET /tasks: ruta ORM + Pydantic vs filas planas + orjson, a varios tamaños de página.
+
+Mide la consulta + serialización de crud.list_tasks tal como la usa el endpoint
+(sin HTTP, auth ni caches), y por separado solo la serialización.
+
+Uso: python -m bench.list_serialization --tasks 5000 --sizes 10 50 200 --repeat 200
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from bench.common import seed_database
+
+
+def _median_ms(samples: list[float]) -> float:
+    return statistics.median(samples) * 1000
+
+
+async def run(args) -> None:
+    from app import crud, schemas
+    from app.db import SessionLocal, dispose_engines
+    from app.responses import dumps, orjson
+
+    print(f"orjson: {'yes' if orjson is not None else 'no (stdlib json fallback)'}")
+    print(f"{'limit':>6} {'orm total':>10} {'fast total':>11} {'speedup':>8} {'orm ser':>9} {'fast ser':>9} {'speedup':>8}")
+
+    async def page(rows: bool, limit: int):
+        async with SessionLocal() as session:
+            items, total, next_cursor = await crud.list_tasks(
+                session, user_id=1, completed=None, limit=limit, offset=0,
+                order_by="due_date", order_dir="asc", total_mode="none", rows=rows,
+            )
+        return items, {"total": total, "limit": limit, "offset": 0, "next_cursor": next_cursor}
+
+    def orm_body(items, meta) -> bytes:
+        return schemas.TaskListOut.model_validate({"items": items, "meta": meta}).model_dump_json().encode()
+
+    def fast_body(items, meta) -> bytes:
+        return dumps({"items": items, "meta": meta})
+
+    for limit in args.sizes:
+        timings = {}
+        for name, rows, serialize in (("orm", False, orm_body), ("fast", True, fast_body)):
+            total, ser = [], []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                items, meta = await page(rows, limit)
+                mid = time.perf_counter()
+                serialize(items, meta)
+                end = time.perf_counter()
+                total.append(end - start)
+                ser.append(end - mid)
+            timings[name] = (_median_ms(total), _median_ms(ser))
+        (orm_total, orm_ser), (fast_total, fast_ser) = timings["orm"], timings["fast"]
+        print(
+            f"{limit:>6} {orm_total:>8.3f}ms {fast_total:>9.3f}ms {orm_total / fast_total:>7.2f}x "
+            f"{orm_ser:>7.3f}ms {fast_ser:>7.3f}ms {orm_ser / fast_ser:>7.2f}x"
+        )
+    await dispose_engines()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=5000)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 100, 200])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--db", default=os.path.join(tempfile.mkdtemp(prefix="bench-"), "list.db"))
+    args = parser.parse_args()
+
+    # antes de importar app.db, que crea el engine al importarse
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.abspath(args.db)}"
+    if not os.path.exists(args.db):
+        seed_database(args.db, 1, args.tasks)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""Load test reproducible de la API: siembra una BD SQLite y reproduce un mix realista.
+
+In-process (httpx + ASGITransport, BD temporal):
+    python -m bench.load --users 50 --tasks-per-user 2000 --duration 20 --output results.json
+
+Contra un uvicorn local (sembrar la BD del servidor antes de arrancarlo):
+    python -m bench.load --seed-only --db ./load.db --users 50 --tasks-per-user 2000
+    DATABASE_URL=sqlite+aiosqlite:///./load.db uvicorn app.main:app &
+    python -m bench.load --base-url http://127.0.0.1:8000 --users 50 --tasks-per-user 2000
+
+Comparar contra otra corrida (p. ej. de otro commit):
+    python -m bench.load ... --output new.json --compare old.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from bench.common import percentile, seed_database
+
+PASSWORD = "bench-password"
+ORDER_BYS = ("due_date", "created_at", "title")
+COMPLETED = (None, True, False)
+
+# (operación, peso relativo)
+MIX = (
+    ("login", 2),
+    ("list", 50),
+    ("list_deep_offset", 8),
+    ("get", 15),
+    ("stats", 3),
+    ("create", 10),
+    ("patch", 10),
+    ("delete", 5),
+)
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Worker:
+    def __init__(self, client, user_id: int, tasks_per_user: int, rng: random.Random, samples, errors):
+        self.client = client
+        self.user_id = user_id
+        self.email = f"user{user_id}@bench.local"
+        self.seeded_ids = range((user_id - 1) * tasks_per_user + 1, user_id * tasks_per_user + 1)
+        self.created: list[int] = []
+        self.deleted: set[int] = set()
+        self.tasks_per_user = tasks_per_user
+        self.rng = rng
+        self.samples = samples
+        self.errors = errors
+        self.headers: dict[str, str] = {}
+
+    async def login(self) -> int:
+        res = await self.client.post("/auth/login", data={"username": self.email, "password": PASSWORD})
+        if res.status_code == 200:
+            self.headers = {"Authorization": f"Bearer {res.json()['access_token']}"}
+        return res.status_code
+
+    def _pick_task(self) -> int:
+        pool = self.created if self.created and self.rng.random() < 0.5 else self.seeded_ids
+        task_id = self.rng.choice(pool)
+        return task_id if task_id not in self.deleted else self.rng.choice(self.seeded_ids)
+
+    async def run_op(self, op: str) -> tuple[str, int]:
+        rng, client, headers = self.rng, self.client, self.headers
+        if op == "login":
+            return op, await self.login()
+        if op in ("list", "list_deep_offset"):
+            order_by, completed = rng.choice(ORDER_BYS), rng.choice(COMPLETED)
+            params = {"order_by": order_by, "order_dir": rng.choice(("asc", "desc")), "limit": 50}
+            if completed is not None:
+                params["completed"] = str(completed).lower()
+            if op == "list_deep_offset":
+                params["offset"] = rng.randint(self.tasks_per_user // 2, max(self.tasks_per_user // 2, self.tasks_per_user - 50))
+            label = f"{op} {order_by} completed={'any' if completed is None else completed}"
+            return label, (await client.get("/tasks", params=params, headers=headers)).status_code
+        if op == "get":
+            return op, (await client.get(f"/tasks/{self._pick_task()}", headers=headers)).status_code
+        if op == "stats":
+            return op, (await client.get("/tasks/stats", headers=headers)).status_code
+        if op == "create":
+            res = await client.post("/tasks", json={"title": f"load {rng.random():.6f}"}, headers=headers)
+            if res.status_code == 201:
+                self.created.append(res.json()["id"])
+            return op, res.status_code
+        if op == "patch":
+            payload = {"is_completed": rng.random() < 0.5, "title": f"patched {rng.random():.6f}"}
+            return op, (await client.patch(f"/tasks/{self._pick_task()}", json=payload, headers=headers)).status_code
+        if op == "delete":
+            if not self.created:
+                return await self.run_op("create")
+            task_id = self.created.pop()
+            self.deleted.add(task_id)
+            return op, (await client.delete(f"/tasks/{task_id}", headers=headers)).status_code
+        raise ValueError(op)
+
+    async def loop(self, deadline: float) -> None:
+        ops, weights = zip(*MIX)
+        while time.perf_counter() < deadline:
+            op = self.rng.choices(ops, weights)[0]
+            start = time.perf_counter()
+            label, status = await self.run_op(op)
+            self.samples[label].append((time.perf_counter() - start) * 1000)
+            if status >= 400 and status != 404:
+                self.errors[label] += 1
+
+
+def _stats(values: list[float], errors: int, elapsed: float) -> dict:
+    return {
+        "count": len(values),
+        "errors": errors,
+        "rps": round(len(values) / elapsed, 2),
+        "mean_ms": round(statistics.fmean(values), 2) if values else 0.0,
+        "p50_ms": round(percentile(values, 50), 2),
+        "p95_ms": round(percentile(values, 95), 2),
+        "p99_ms": round(percentile(values, 99), 2),
+    }
+
+
+def summarize(samples: dict[str, list[float]], errors: dict[str, int], elapsed: float) -> dict:
+    results = {label: _stats(samples[label], errors.get(label, 0), elapsed) for label in sorted(samples)}
+    all_values = list(itertools.chain.from_iterable(samples.values()))
+    results["ALL"] = _stats(all_values, sum(errors.values()), elapsed)
+    return results
+
+
+def print_report(results: dict, baseline: dict | None) -> None:
+    print(f"{'operation':<42} {'n':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for label, r in results.items():
+        line = (
+            f"{label:<42} {r['count']:>7} {r['errors']:>5} {r['rps']:>8.1f} "
+            f"{r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f}"
+        )
+        old = (baseline or {}).get(label)
+        if old and old["p99_ms"]:
+            line += f"   p99 {100 * (r['p99_ms'] - old['p99_ms']) / old['p99_ms']:+.1f}%"
+        print(line)
+
+
+async def run(args) -> dict:
+    import httpx
+
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=60)
+    else:
+        from app.main import app
+
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+    samples: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+    rng = random.Random(args.seed)
+    async with client:
+        workers = [
+            Worker(client, rng.randint(1, args.users), args.tasks_per_user, random.Random(rng.random()), samples, errors)
+            for _ in range(args.concurrency)
+        ]
+        for worker in workers:
+            if await worker.login() != 200:
+                raise SystemExit(f"login failed for {worker.email}; is the database seeded?")
+
+        if args.warmup > 0:
+            await asyncio.gather(*(w.loop(time.perf_counter() + args.warmup) for w in workers))
+            samples.clear()
+            errors.clear()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(w.loop(start + args.duration) for w in workers))
+        elapsed = time.perf_counter() - start
+    return summarize(samples, errors, elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--tasks-per-user", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", help="ruta de la BD SQLite (por defecto una temporal)")
+    parser.add_argument("--base-url", help="servidor ya corriendo; si se omite se usa la app in-process")
+    parser.add_argument("--seed-only", action="store_true", help="solo sembrar la BD y salir")
+    parser.add_argument("--no-seed", action="store_true", help="usar la BD tal como está")
+    parser.add_argument("--output", help="guardar resultados en JSON")
+    parser.add_argument("--compare", help="JSON de una corrida anterior para comparar p99")
+    args = parser.parse_args()
+
+    db_path = os.path.abspath(args.db or os.path.join(tempfile.mkdtemp(prefix="bench-"), "load.db"))
+    if not args.base_url:
+        # antes de importar app.db, que crea el engine al importarse
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{db_path}"
+    if not args.no_seed and not os.path.exists(db_path):
+        from app.security import hash_password
+
+        start = time.perf_counter()
+        seed_database(db_path, args.users, args.tasks_per_user, hashed_password=hash_password(PASSWORD), seed=args.seed)
+        print(f"seeded {args.users} users x {args.tasks_per_user} tasks in {time.perf_counter() - start:.1f}s -> {db_path}")
+    if args.seed_only:
+        return
+
+    results = asyncio.run(run(args))
+    baseline = None
+    if args.compare:
+        with open(args.compare) as fh:
+            baseline = json.load(fh)["results"]
+    print_report(results, baseline)
+
+    if args.output:
+        report = {
+            "meta": {
+                "commit": git_commit(),
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "target": args.base_url or "in-process",
+                "args": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+            },
+            "results": results,
+        }
+        with open(args.output, "w") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"saved {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""p99 de GET /tasks mientras corren logins concurrentes (in-process con httpx).
+
+Uso: python -m bench.login_contention --duration 5 --login-concurrency 8
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from bench.common import percentile
+
+
+async def run(duration: float, login_concurrency: int, read_concurrency: int) -> None:
+    import httpx
+    from app.db import init_models
+    from app.main import app
+
+    await init_models()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        creds = {"username": "bench@example.com", "password": "bench-password"}
+        await client.post("/auth/register", json={"email": creds["username"], "password": creds["password"]})
+        token = (await client.post("/auth/login", data=creds)).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        for i in range(50):
+            await client.post("/tasks", json={"title": f"task {i}"}, headers=headers)
+
+        async def reader(deadline: float, samples: list[float]) -> None:
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                await client.get("/tasks", params={"limit": 50}, headers=headers)
+                samples.append((time.perf_counter() - start) * 1000)
+
+        async def login_loop(deadline: float, statuses: list[int]) -> None:
+            while time.perf_counter() < deadline:
+                statuses.append((await client.post("/auth/login", data=creds)).status_code)
+
+        for label, logins in (("idle", 0), ("logins", login_concurrency)):
+            samples: list[float] = []
+            statuses: list[int] = []
+            deadline = time.perf_counter() + duration
+            await asyncio.gather(
+                *(reader(deadline, samples) for _ in range(read_concurrency)),
+                *(login_loop(deadline, statuses) for _ in range(logins)),
+            )
+            print(
+                f"{label:>7}: /tasks n={len(samples)} p50={percentile(samples, 50):.1f}ms "
+                f"p99={percentile(samples, 99):.1f}ms mean={statistics.fmean(samples):.1f}ms | "
+                f"logins ok={statuses.count(200)} rejected={statuses.count(503)}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--login-concurrency", type=int, default=8)
+    parser.add_argument("--read-concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    # BD desechable salvo que se indique DATABASE_URL
+    os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{tempfile.mkdtemp(prefix='bench-')}/bench.db")
+    asyncio.run(run(args.duration, args.login_concurrency, args.read_concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""FTS5 vs LIKE '%..%' sobre una BD SQLite sembrada (por defecto 1M tareas).
+
+Uso: python -m bench.search_fts --tasks 1000000 --users 100 --db /tmp/search-bench.db
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from bench.common import seed_database
+
+def timed(db: sqlite3.Connection, sql: str, params: tuple, repeat: int) -> tuple[float, int]:
+    samples, rows = [], 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = len(db.execute(sql, params).fetchall())
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--db", default=os.path.join(tempfile.mkdtemp(prefix="bench-"), "search.db"))
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        start = time.perf_counter()
+        seed_database(args.db, args.users, args.tasks // args.users)
+        print(f"seeded {args.tasks} tasks in {time.perf_counter() - start:.1f}s -> {args.db}")
+
+    db = sqlite3.connect(args.db)
+    fts_sql = (
+        "SELECT tasks.id FROM tasks JOIN tasks_fts ON tasks_fts.rowid = tasks.id "
+        "WHERE tasks_fts MATCH ? AND tasks.user_id = ? ORDER BY bm25(tasks_fts, 10.0, 1.0, 0.0) LIMIT 50"
+    )
+    like_sql = (
+        "SELECT id FROM tasks WHERE user_id = ? AND (title LIKE ? OR description LIKE ?) "
+        "ORDER BY id LIMIT 50"
+    )
+    like_all_sql = "SELECT id FROM tasks WHERE user_id = ? AND (title LIKE ? OR description LIKE ?)"
+    for term in ("dentista", "pasaporte renovar", "zzz"):
+        # misma forma de consulta que crud.search_tasks
+        fts_query = 'owner : "u7" AND {title description} : (' + " ".join(f'"{t}"*' for t in term.split()) + ")"
+        fts_ms, fts_rows = timed(db, fts_sql, (fts_query, 7), args.repeat)
+        like = f"%{term.split()[0]}%"
+        like_ms, like_rows = timed(db, like_sql, (7, like, like), args.repeat)
+        like_all_ms, _ = timed(db, like_all_sql, (7, like, like), args.repeat)
+        print(
+            f"{term!r:>22}: fts={fts_ms:7.2f}ms ({fts_rows} rows) | like top50={like_ms:7.2f}ms ({like_rows} rows) "
+            f"| like all={like_all_ms:7.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import itertools
+import os
+import tempfile
+
+# antes de importar app.db, que crea el engine al importarse
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tempfile.mkdtemp(prefix='tasks-test-')}/tasks.db"
+os.environ["TASKS_PAGE_CACHE_TTL"] = "0"
+os.environ["HASH_ROUNDS"] = "1000"
+
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+
+from app.db import dispose_engines, init_models  # noqa: E402
+from app.main import app  # noqa: E402
+
+_emails = itertools.count(1)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def client():
+    await init_models()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as c:
+        yield c
+    # los engines quedan atados al event loop de cada test
+    await dispose_engines()
+
+
+@pytest.fixture
+def register(client):
+    # registra un usuario nuevo y devuelve los headers con su token
+    async def _register() -> dict[str, str]:
+        email = f"user{next(_emails)}@example.com"
+        res = await client.post("/auth/register", json={"email": email, "password": "secret1"})
+        assert res.status_code == 201, res.text
+        res = await client.post("/auth/login", data={"username": email, "password": "secret1"})
+        assert res.status_code == 200, res.text
+        return {"Authorization": f"Bearer {res.json()['access_token']}"}
+
+    return _register
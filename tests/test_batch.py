@@ -0,0 +1,70 @@
+import pytest
+
+from app.schemas import MAX_BATCH_ITEMS
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_batch_create_results_follow_input_order(client, register):
+    headers = await register()
+    titles = [f"item {i}" for i in range(20)]
+    res = await client.post("/tasks/batch", json={"items": [{"title": t} for t in titles]}, headers=headers)
+    assert res.status_code == 201, res.text
+    items = res.json()["items"]
+    assert [item["task"]["title"] for item in items] == titles
+    assert all(item["status"] == "created" and item["id"] == item["task"]["id"] for item in items)
+
+
+async def test_batch_update_not_found_and_duplicates(client, register):
+    headers, other = await register(), await register()
+    res = await client.post("/tasks/batch", json={"items": [{"title": "a"}, {"title": "b"}]}, headers=headers)
+    a, b = (item["id"] for item in res.json()["items"])
+    foreign = (await client.post("/tasks", json={"title": "not yours"}, headers=other)).json()["id"]
+
+    res = await client.patch("/tasks/batch", json={"items": [
+        {"id": a, "title": "a1"},
+        {"id": b, "is_completed": True},
+        {"id": a, "title": "a2", "is_completed": True},
+        {"id": a, "title": "a1"},
+        {"id": foreign, "title": "hijacked"},
+        {"id": 10**9, "title": "missing"},
+    ]}, headers=headers)
+    assert res.status_code == 200, res.text
+    statuses = [(item["id"], item["status"]) for item in res.json()["items"]]
+    assert statuses == [
+        (a, "updated"), (b, "updated"), (a, "updated"), (a, "updated"), (foreign, "not_found"), (10**9, "not_found"),
+    ]
+    # los cambios de un id repetido se aplican en orden: gana el último valor de cada campo
+    task_a = (await client.get(f"/tasks/{a}", headers=headers)).json()
+    assert (task_a["title"], task_a["is_completed"]) == ("a1", True)
+    assert (await client.get(f"/tasks/{foreign}", headers=other)).json()["title"] == "not yours"
+
+
+async def test_batch_delete_not_found_and_duplicates(client, register):
+    headers, other = await register(), await register()
+    res = await client.post("/tasks/batch", json={"items": [{"title": "a"}, {"title": "b"}]}, headers=headers)
+    a, b = (item["id"] for item in res.json()["items"])
+    foreign = (await client.post("/tasks", json={"title": "not yours"}, headers=other)).json()["id"]
+
+    res = await client.request("DELETE", "/tasks/batch", json={"ids": [a, a, foreign, 10**9]}, headers=headers)
+    assert res.status_code == 200, res.text
+    assert [item["status"] for item in res.json()["items"]] == ["deleted", "deleted", "not_found", "not_found"]
+    assert (await client.get(f"/tasks/{a}", headers=headers)).status_code == 404
+    assert (await client.get(f"/tasks/{b}", headers=headers)).status_code == 200
+    assert (await client.get(f"/tasks/{foreign}", headers=other)).status_code == 200
+
+
+@pytest.mark.parametrize("method,body", [
+    ("POST", lambda n: {"items": [{"title": "t"}] * n}),
+    ("PATCH", lambda n: {"items": [{"id": 1, "title": "t"}] * n}),
+    ("DELETE", lambda n: {"ids": [1] * n}),
+])
+async def test_batch_item_limit(client, register, method, body):
+    headers = await register()
+    res = await client.request(method, "/tasks/batch", json=body(MAX_BATCH_ITEMS + 1), headers=headers)
+    assert res.status_code == 422
+    res = await client.request(method, "/tasks/batch", json=body(0), headers=headers)
+    assert res.status_code == 422
+    res = await client.request(method, "/tasks/batch", json=body(MAX_BATCH_ITEMS), headers=headers)
+    assert res.status_code in (200, 201), res.text
+    assert len(res.json()["items"]) == MAX_BATCH_ITEMS
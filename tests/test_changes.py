@@ -0,0 +1,78 @@
+import pytest
+
+from app import crud
+from app.db import SessionLocal
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_token_inside_purged_change_seq_requires_resync(client, register):
+    headers = await register()
+    ids = []
+    for i in range(4):
+        res = await client.post("/tasks", json={"title": f"t{i}"}, headers=headers)
+        ids.append(res.json()["id"])
+    # un DELETE en lote deja los tres tombstones con el mismo change_seq
+    res = await client.request("DELETE", "/tasks/batch", json={"ids": ids[:3]}, headers=headers)
+    assert res.status_code == 200, res.text
+
+    res = await client.get("/tasks/changes", params={"limit": 2}, headers=headers)
+    assert res.json()["has_more"] is True
+    # la página terminó a mitad de ese change_seq
+    token = res.json()["next_since"]
+
+    async with SessionLocal() as session:
+        assert await crud.purge_tombstones(session, older_than_days=-1) >= 3
+
+    res = await client.get("/tasks/changes", params={"since": token}, headers=headers)
+    assert res.status_code == 410, res.text
+
+
+async def test_full_resync_after_purge_then_poll_succeeds(client, register):
+    headers = await register()
+    ids = []
+    for i in range(3):
+        res = await client.post("/tasks", json={"title": f"t{i}"}, headers=headers)
+        ids.append(res.json()["id"])
+    assert (await client.delete(f"/tasks/{ids[0]}", headers=headers)).status_code == 204
+    async with SessionLocal() as session:
+        assert await crud.purge_tombstones(session, older_than_days=-1) >= 1
+
+    res = await client.get("/tasks/changes", headers=headers)
+    assert res.status_code == 200, res.text
+    assert [item["id"] for item in res.json()["items"]] == ids[1:]
+    assert res.json()["has_more"] is False
+    token = res.json()["next_since"]
+
+    # sin escrituras nuevas el poll sigue funcionando (no queda atascado en 410)
+    res = await client.get("/tasks/changes", params={"since": token}, headers=headers)
+    assert res.status_code == 200, res.text
+    assert res.json()["items"] == []
+    token = res.json()["next_since"]
+
+    res = await client.post("/tasks", json={"title": "new"}, headers=headers)
+    res = await client.get("/tasks/changes", params={"since": token}, headers=headers)
+    assert res.status_code == 200, res.text
+    assert [item["id"] for item in res.json()["items"]] == [res.json()["items"][0]["id"]]
+    assert res.json()["items"][0]["task"]["title"] == "new"
+
+
+async def test_paging_changes_delivers_each_change_once(client, register):
+    headers = await register()
+    ids = []
+    for i in range(5):
+        ids.append((await client.post("/tasks", json={"title": f"t{i}"}, headers=headers)).json()["id"])
+    res = await client.request("DELETE", "/tasks/batch", json={"ids": ids[:3]}, headers=headers)
+    assert res.status_code == 200, res.text
+
+    seen, token = [], None
+    while True:
+        res = await client.get("/tasks/changes", params={"limit": 2, **({"since": token} if token else {})}, headers=headers)
+        assert res.status_code == 200, res.text
+        seen += [item["id"] for item in res.json()["items"]]
+        token = res.json()["next_since"]
+        if not res.json()["has_more"]:
+            break
+    assert len(seen) == len(set(seen))
+    res = await client.get("/tasks/changes", params={"since": token}, headers=headers)
+    assert res.json()["items"] == []
@@ -0,0 +1,79 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import text
+
+from app.db import engine
+from app.etags import http_date
+
+pytestmark = pytest.mark.anyio
+
+
+async def _age_changed_at(email: str) -> None:
+    # lleva el último cambio a un segundo ya cerrado para que Last-Modified se publique
+    async with engine.begin() as conn:
+        await conn.execute(
+            text("UPDATE users SET tasks_changed_at = '2020-01-01 00:00:00' WHERE email = :email"),
+            {"email": email},
+        )
+
+
+async def test_list_if_none_match(client, register):
+    headers = await register()
+    await client.post("/tasks", json={"title": "a"}, headers=headers)
+    res = await client.get("/tasks", headers=headers)
+    etag = res.headers["etag"]
+
+    res = await client.get("/tasks", headers={**headers, "If-None-Match": etag})
+    assert res.status_code == 304
+    assert res.headers["etag"] == etag
+
+    await client.post("/tasks", json={"title": "b"}, headers=headers)
+    res = await client.get("/tasks", headers={**headers, "If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.headers["etag"] != etag
+
+
+async def test_list_if_modified_since_same_second_write_is_not_304(client, register):
+    headers = await register()
+    await client.post("/tasks", json={"title": "a"}, headers=headers)
+    res = await client.get("/tasks", headers=headers)
+    # el cambio es de este mismo segundo: no se publica Last-Modified
+    assert "last-modified" not in res.headers
+
+    await client.post("/tasks", json={"title": "b"}, headers=headers)
+    res = await client.get("/tasks", headers={**headers, "If-Modified-Since": http_date(datetime.now(timezone.utc))})
+    assert res.status_code == 200
+    assert len(res.json()["items"]) == 2
+
+
+async def test_list_if_modified_since(client, register):
+    headers = await register()
+    email = (await client.get("/me", headers=headers)).json()["email"]
+    await client.post("/tasks", json={"title": "a"}, headers=headers)
+    await _age_changed_at(email)
+
+    res = await client.get("/tasks", headers=headers)
+    last_modified = res.headers["last-modified"]
+    assert last_modified == "Wed, 01 Jan 2020 00:00:00 GMT"
+    res = await client.get("/tasks", headers={**headers, "If-Modified-Since": last_modified})
+    assert res.status_code == 304
+
+    await client.post("/tasks", json={"title": "b"}, headers=headers)
+    res = await client.get("/tasks", headers={**headers, "If-Modified-Since": last_modified})
+    assert res.status_code == 200
+
+
+async def test_detail_if_none_match(client, register):
+    headers = await register()
+    res = await client.post("/tasks", json={"title": "a"}, headers=headers)
+    task_id, etag = res.json()["id"], res.headers["etag"]
+
+    res = await client.get(f"/tasks/{task_id}", headers={**headers, "If-None-Match": etag})
+    assert res.status_code == 304
+    assert res.headers["etag"] == etag
+
+    await client.patch(f"/tasks/{task_id}", json={"title": "b"}, headers=headers)
+    res = await client.get(f"/tasks/{task_id}", headers={**headers, "If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.json()["title"] == "b"
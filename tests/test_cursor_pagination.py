@@ -0,0 +1,74 @@
+import base64
+import json
+
+import pytest
+
+from app.pagination import encode_cursor
+
+pytestmark = pytest.mark.anyio
+
+
+async def _create(client, headers, titles):
+    ids = []
+    for title in titles:
+        res = await client.post("/tasks", json={"title": title}, headers=headers)
+        assert res.status_code == 201, res.text
+        ids.append(res.json()["id"])
+    return ids
+
+
+async def test_cursor_anchor_from_another_user_is_ignored(client, register):
+    alice, bob = await register(), await register()
+    alice_ids = await _create(client, alice, ["secret-m", "secret-n"])
+    await _create(client, bob, ["a", "b", "secret-m", "secret-n", "secret-o", "z"])
+
+    # cursor armado a mano con el id de una tarea de alice y un valor de cursor neutro
+    cursor = encode_cursor("title", "asc", "", alice_ids[0])
+    res = await client.get("/tasks", params={"order_by": "title", "cursor": cursor, "limit": 10}, headers=bob)
+    assert res.status_code == 200, res.text
+    # la página arranca en el valor del cursor, no en el título de alice
+    assert [task["title"] for task in res.json()["items"]] == ["a", "b", "secret-m", "secret-n", "secret-o", "z"]
+
+
+async def test_cursor_walks_every_order_without_gaps(client, register):
+    headers = await register()
+    for i in range(7):
+        due = None if i % 3 == 0 else f"2026-01-0{i + 1}T00:00:00"
+        res = await client.post("/tasks", json={"title": f"t{i % 2}", "due_date": due}, headers=headers)
+        assert res.status_code == 201
+
+    for order_by in ("due_date", "created_at", "title"):
+        for order_dir in ("asc", "desc"):
+            params = {"order_by": order_by, "order_dir": order_dir}
+            full = await client.get("/tasks", params={**params, "limit": 100}, headers=headers)
+            expected = [task["id"] for task in full.json()["items"]]
+
+            seen, cursor = [], None
+            while True:
+                page = await client.get(
+                    "/tasks", params={**params, "limit": 2, **({"cursor": cursor} if cursor else {})}, headers=headers
+                )
+                assert page.status_code == 200, page.text
+                seen += [task["id"] for task in page.json()["items"]]
+                cursor = page.json()["meta"]["next_cursor"]
+                if cursor is None:
+                    break
+            assert seen == expected, (order_by, order_dir)
+
+
+@pytest.mark.parametrize("order_by,value,task_id", [
+    ("title", [1], 1),
+    ("title", {"a": 1}, 1),
+    ("title", 5, 1),
+    ("title", None, 1),
+    ("created_at", 5, 1),
+    ("created_at", "not a date", 1),
+    ("due_date", [1], 1),
+    ("title", "a", "x"),
+])
+async def test_malformed_cursor_values_are_400(client, register, order_by, value, task_id):
+    headers = await register()
+    raw = json.dumps({"o": order_by, "d": "asc", "v": value, "id": task_id}).encode()
+    cursor = base64.urlsafe_b64encode(raw).decode().rstrip("=")
+    res = await client.get("/tasks", params={"order_by": order_by, "cursor": cursor}, headers=headers)
+    assert res.status_code == 400, res.text
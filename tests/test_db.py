@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# el engine se crea al importar app.db, así que cada URL corre en su propio proceso
+IN_MEMORY_SCRIPT = """
+import asyncio
+import httpx
+from app.db import init_models
+from app.main import app
+
+async def main():
+    await init_models()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        res = await client.post("/auth/register", json={"email": "mem@example.com", "password": "secret1"})
+        assert res.status_code == 201, res.text
+        res = await client.post("/auth/login", data={"username": "mem@example.com", "password": "secret1"})
+        headers = {"Authorization": "Bearer " + res.json()["access_token"]}
+        res = await client.post("/tasks", json={"title": "in memory"}, headers=headers)
+        assert res.status_code == 201, res.text
+        # requests concurrentes: con un pool de varias conexiones cada una vería una BD vacía
+        pages = await asyncio.gather(*(client.get("/tasks", headers=headers) for _ in range(5)))
+        for res in pages:
+            assert [task["title"] for task in res.json()["items"]] == ["in memory"], res.text
+        # sin pool con cola la espera se registra con el evento checkout
+        res = await client.get("/metrics")
+        assert 'db_pool_wait_seconds_count{engine="default"}' in res.text
+
+asyncio.run(main())
+"""
+
+
+def test_in_memory_sqlite_keeps_one_database():
+    env = {**os.environ, "DATABASE_URL": "sqlite+aiosqlite:///:memory:", "PYTHONPATH": str(ROOT)}
+    result = subprocess.run([sys.executable, "-c", IN_MEMORY_SCRIPT], env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,58 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def _create(client, headers):
+    res = await client.post("/tasks", json={"title": "etag"}, headers=headers)
+    assert res.status_code == 201, res.text
+    return res.json()["id"], res.headers["etag"]
+
+
+async def test_if_match_strong_etag_succeeds(client, register):
+    headers = await register()
+    task_id, etag = await _create(client, headers)
+    res = await client.patch(f"/tasks/{task_id}", json={"title": "new"}, headers={**headers, "If-Match": etag})
+    assert res.status_code == 200, res.text
+    assert res.headers["etag"] != etag
+
+    res = await client.patch(f"/tasks/{task_id}", json={"title": "again"}, headers={**headers, "If-Match": etag})
+    assert res.status_code == 412
+
+
+async def test_if_match_rejects_weak_etag(client, register):
+    headers = await register()
+    task_id, etag = await _create(client, headers)
+    weak = {**headers, "If-Match": f"W/{etag}"}
+    assert (await client.patch(f"/tasks/{task_id}", json={"title": "new"}, headers=weak)).status_code == 412
+    assert (await client.delete(f"/tasks/{task_id}", headers=weak)).status_code == 412
+    assert (await client.get(f"/tasks/{task_id}", headers=headers)).json()["title"] == "etag"
+
+
+async def test_if_match_on_missing_task_is_412(client, register):
+    headers = await register()
+    task_id, etag = await _create(client, headers)
+    assert (await client.delete(f"/tasks/{task_id}", headers=headers)).status_code == 204
+
+    conditional = {**headers, "If-Match": etag}
+    assert (await client.patch(f"/tasks/{task_id}", json={"title": "x"}, headers=conditional)).status_code == 412
+    assert (await client.delete(f"/tasks/{task_id}", headers=conditional)).status_code == 412
+    # sin If-Match sigue siendo 404
+    assert (await client.patch(f"/tasks/{task_id}", json={"title": "x"}, headers=headers)).status_code == 404
+    assert (await client.delete(f"/tasks/{task_id}", headers=headers)).status_code == 404
+
+
+async def test_if_match_list_succeeds_when_any_strong_tag_matches(client, register):
+    headers = await register()
+    task_id, etag = await _create(client, headers)
+    stale = f'"{task_id}-99"'
+    listed = {**headers, "If-Match": f'{stale}, W/"{task_id}-1", {etag}'}
+    res = await client.patch(f"/tasks/{task_id}", json={"title": "new"}, headers=listed)
+    assert res.status_code == 200, res.text
+
+    # ninguno coincide (el débil no cuenta aunque su versión sea la actual)
+    current = res.headers["etag"]
+    res = await client.delete(f"/tasks/{task_id}", headers={**headers, "If-Match": f"{stale}, W/{current}"})
+    assert res.status_code == 412
+    res = await client.delete(f"/tasks/{task_id}", headers={**headers, "If-Match": f"{stale},{current}"})
+    assert res.status_code == 204
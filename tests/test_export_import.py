@@ -0,0 +1,111 @@
+import json
+
+import pytest
+
+from app import export
+
+pytestmark = pytest.mark.anyio
+
+MULTILINE = 'primera línea, con coma\nsegunda "citada"\n\nfin'
+
+
+async def _chunks(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+async def _records(data: bytes, fmt, size=7):
+    return [item async for item in export._iter_records(_chunks(data, size), fmt)]
+
+
+async def _titles(client, headers):
+    res = await client.get("/tasks", params={"limit": 100}, headers=headers)
+    return {task["title"]: task for task in res.json()["items"]}
+
+
+@pytest.mark.parametrize("fmt", ["csv", "ndjson"])
+async def test_export_import_round_trip(client, register, fmt):
+    src, dst = await register(), await register()
+    await client.post("/tasks", json={"title": "multilinea", "description": MULTILINE}, headers=src)
+    await client.post("/tasks", json={"title": 'comillas "dobles", y comas', "due_date": "2030-01-02T03:04:05"}, headers=src)
+    await client.post("/tasks", json={"title": "sin descripcion"}, headers=src)
+
+    res = await client.get("/tasks/export", params={"format": fmt}, headers=src)
+    assert res.status_code == 200
+    body = res.content
+
+    res = await client.post("/tasks/import", params={"format": fmt}, content=body, headers=dst)
+    assert res.status_code == 200, res.text
+    assert res.json() == {"imported": 3, "errors": []}
+
+    tasks = await _titles(client, dst)
+    assert set(tasks) == {"multilinea", 'comillas "dobles", y comas', "sin descripcion"}
+    assert tasks["multilinea"]["description"] == MULTILINE
+    assert tasks['comillas "dobles", y comas']["due_date"].startswith("2030-01-02T03:04:05")
+    assert tasks["sin descripcion"]["description"] is None
+
+
+async def test_csv_records_span_quoted_newlines():
+    data = (
+        'title,description\r\n'
+        'uno,"a\r\nb, ""c""\r\n"\r\n'
+        'dos,\r\n'
+        '\r\n'
+        'tres,"x"\r\n'
+    ).encode()
+    # trozos chicos: las comillas y los saltos quedan partidos entre chunks
+    assert await _records(data, "csv", size=3) == [
+        (2, {"title": "uno", "description": 'a\nb, "c"\n'}),
+        (5, {"title": "dos"}),
+        (7, {"title": "tres", "description": "x"}),
+    ]
+
+
+async def test_ndjson_records_report_line_errors():
+    data = 'ñandú\n{"title": "ok"}\n\n[1]\n{"title": "ñ"}'.encode()
+    records = await _records(data, "ndjson", size=1)
+    assert [line for line, _ in records] == [1, 2, 4, 5]
+    assert records[0][1]["__error__"].startswith("Invalid JSON")
+    assert records[1][1] == {"title": "ok"}
+    assert records[2][1] == {"__error__": "Expected a JSON object"}
+    assert records[3][1] == {"title": "ñ"}
+
+
+async def test_import_reports_invalid_rows(client, register):
+    headers = await register()
+    lines = [
+        json.dumps({"title": "valida"}),
+        "{no es json",
+        json.dumps({"description": "sin titulo"}),
+        json.dumps({"title": "x" * 1000}),
+        '"texto"',
+        json.dumps({"title": "otra valida", "is_completed": True}),
+    ]
+    res = await client.post("/tasks/import", params={"format": "ndjson"}, content="\n".join(lines), headers=headers)
+    assert res.status_code == 200, res.text
+    result = res.json()
+    assert result["imported"] == 2
+    assert [error["line"] for error in result["errors"]] == [2, 3, 4, 5]
+    assert result["errors"][0]["detail"].startswith("Invalid JSON")
+    assert result["errors"][1]["detail"].startswith("title:")
+    assert result["errors"][2]["detail"].startswith("title:")
+    assert result["errors"][3]["detail"] == "Expected a JSON object"
+    assert set(await _titles(client, headers)) == {"valida", "otra valida"}
+
+
+async def test_csv_import_reports_errors_by_starting_line(client, register):
+    headers = await register()
+    body = (
+        'title,description,due_date\n'
+        'buena,"dos\nlineas",\n'
+        ',sin titulo,\n'
+        'mala fecha,x,mañana\n'
+        'con fecha,y,2030-01-01T00:00:00\n'
+    )
+    res = await client.post("/tasks/import", params={"format": "csv"}, content=body.encode(), headers=headers)
+    result = res.json()
+    assert result["imported"] == 2
+    assert [error["line"] for error in result["errors"]] == [4, 5]
+    assert result["errors"][0]["detail"].startswith("title:")
+    assert result["errors"][1]["detail"].startswith("due_date:")
+    assert set(await _titles(client, headers)) == {"buena", "con fecha"}
@@ -0,0 +1,78 @@
+import sqlite3
+
+from sqlalchemy import create_engine, insert, select, text
+from sqlalchemy.orm import Session
+
+from app.migrations import HEAD, upgrade
+from app.models import Task, TaskStats, User
+
+# esquema de la primera versión (solo create_all, sin schema_version)
+LEGACY_SCHEMA = """
+CREATE TABLE users (
+    id INTEGER NOT NULL, email VARCHAR(255) NOT NULL, hashed_password VARCHAR(255) NOT NULL,
+    is_active BOOLEAN NOT NULL, created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, PRIMARY KEY (id)
+);
+CREATE UNIQUE INDEX ix_users_email ON users (email);
+CREATE INDEX ix_users_id ON users (id);
+CREATE TABLE tasks (
+    id INTEGER NOT NULL, title VARCHAR(200) NOT NULL, description VARCHAR(1000), is_completed BOOLEAN NOT NULL,
+    due_date DATETIME, created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, user_id INTEGER NOT NULL,
+    PRIMARY KEY (id), FOREIGN KEY(user_id) REFERENCES users (id)
+);
+CREATE INDEX ix_tasks_user_id ON tasks (user_id);
+CREATE INDEX ix_tasks_id ON tasks (id);
+CREATE INDEX ix_tasks_is_completed ON tasks (is_completed);
+INSERT INTO users (id, email, hashed_password, is_active) VALUES (1, 'old@example.com', 'x', 1);
+INSERT INTO tasks (title, is_completed, user_id) VALUES ('old open', 0, 1), ('old done', 1, 1);
+"""
+
+
+def _legacy_engine(tmp_path):
+    path = tmp_path / "legacy.db"
+    db = sqlite3.connect(path)
+    db.executescript(LEGACY_SCHEMA)
+    db.close()
+    return create_engine(f"sqlite:///{path}")
+
+
+def test_legacy_database_upgrades_to_head(tmp_path):
+    engine = _legacy_engine(tmp_path)
+    with engine.begin() as conn:
+        assert upgrade(conn) == HEAD
+        assert conn.execute(text("SELECT version FROM schema_version")).scalar_one() == HEAD
+        # idempotente: una segunda corrida no hace nada
+        assert upgrade(conn) == HEAD
+    with Session(engine) as session:
+        assert session.get(TaskStats, 1).total == 2
+        assert session.get(TaskStats, 1).completed == 1
+        assert all(task.updated_at is not None for task in session.scalars(select(Task)))
+    engine.dispose()
+
+
+def test_inserts_after_upgrade_get_updated_at(tmp_path):
+    engine = _legacy_engine(tmp_path)
+    with engine.begin() as conn:
+        upgrade(conn)
+    with Session(engine) as session:
+        # camino ORM (create_task) y Core executemany (batch / import)
+        task = Task(title="orm", user_id=1)
+        session.add(task)
+        session.execute(insert(Task), [{"title": "core", "user_id": 1, "is_completed": False}])
+        session.commit()
+        rows = session.execute(select(Task.title, Task.updated_at).where(Task.title.in_(["orm", "core"]))).all()
+        assert len(rows) == 2
+        assert all(updated_at is not None for _, updated_at in rows), rows
+        assert session.get(User, 1).tasks_version == 0
+    engine.dispose()
+
+
+def test_upgrade_backfills_null_updated_at(tmp_path):
+    engine = _legacy_engine(tmp_path)
+    with engine.begin() as conn:
+        upgrade(conn)
+        # estado de una BD que ya pasó por la 7 con el bug del default
+        conn.execute(text("UPDATE tasks SET updated_at = NULL"))
+        conn.execute(text("UPDATE schema_version SET version = 7"))
+        upgrade(conn)
+        assert conn.execute(text("SELECT count(*) FROM tasks WHERE updated_at IS NULL")).scalar_one() == 0
+    engine.dispose()
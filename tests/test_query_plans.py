@@ -0,0 +1,91 @@
+import itertools
+import re
+import sqlite3
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event, insert
+
+from app import crud
+from app.db import SessionLocal, dispose_engines, init_models, read_engine
+from app.models import Task, User
+from app.pagination import encode_cursor
+
+pytestmark = pytest.mark.anyio
+
+_users = itertools.count(1)
+
+CASES = list(itertools.product(("due_date", "created_at", "title"), ("asc", "desc"), (None, True, False)))
+
+
+@pytest.fixture
+async def listing():
+    # un usuario con tareas con y sin due_date; devuelve (user_id, SQL capturado de los listados)
+    await init_models()
+    async with SessionLocal() as session:
+        user_id = (await session.execute(
+            insert(User).values(email=f"plans{next(_users)}@example.com", hashed_password="x").returning(User.id)
+        )).scalar_one()
+        await session.execute(insert(Task), [
+            {"title": f"t{i}", "is_completed": i % 2 == 0, "due_date": None if i % 3 else datetime(2026, 1, i + 1),
+             "user_id": user_id}
+            for i in range(12)
+        ])
+        await session.commit()
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith("SELECT") and "count(" not in statement:
+            statements.append((statement, parameters))
+
+    event.listen(read_engine.sync_engine, "before_cursor_execute", capture)
+    yield user_id, statements
+    event.remove(read_engine.sync_engine, "before_cursor_execute", capture)
+    await dispose_engines()
+
+
+def _plan(statement: str, parameters) -> list[str]:
+    db = sqlite3.connect(read_engine.url.database)
+    try:
+        return [row[3] for row in db.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+    finally:
+        db.close()
+
+
+def _assert_index_seek(statement: str, parameters, order_by: str, completed: bool | None, seek: bool) -> None:
+    plan = _plan(statement, parameters)
+    assert not [line for line in plan if "TEMP B-TREE" in line], plan
+    # la tabla principal (la ancla del cursor es un alias y va por PRIMARY KEY)
+    main = [line for line in plan if line.startswith(("SEARCH tasks ", "SCAN tasks"))]
+    assert len(main) == 1, plan
+    index = f"ix_tasks_user_completed_{order_by}" if completed is not None else f"ix_tasks_user_{order_by}"
+    assert f"USING INDEX {index} " in main[0] or f"USING COVERING INDEX {index} " in main[0], plan
+    if seek:
+        # range seek: el índice acota por la columna de orden (o por id dentro del bloque NULL)
+        assert re.search(rf"\b({order_by}|id)[<>=]", main[0]), plan
+
+
+@pytest.mark.parametrize("order_by,order_dir,completed", CASES)
+async def test_listing_uses_index_without_sort(listing, order_by, order_dir, completed):
+    user_id, statements = listing
+    async with SessionLocal() as session:
+        items, _, _ = await crud.list_tasks(
+            session, user_id, completed, limit=50, offset=0, order_by=order_by, order_dir=order_dir, total_mode="none",
+        )
+    assert len(statements) == 1
+    _assert_index_seek(*statements[0], order_by, completed, seek=False)
+
+    # un cursor por cada tipo de ancla (valor NULL y no NULL); limit alto para que corran todos los tramos
+    anchors = {getattr(task, order_by) is None: task for task in items}
+    for task in anchors.values():
+        statements.clear()
+        cursor = encode_cursor(order_by, order_dir, getattr(task, order_by), task.id)
+        async with SessionLocal() as session:
+            await crud.list_tasks(
+                session, user_id, completed, limit=50, offset=0, order_by=order_by, order_dir=order_dir,
+                cursor=cursor, total_mode="none",
+            )
+        assert statements
+        for statement, parameters in statements:
+            _assert_index_seek(statement, parameters, order_by, completed, seek=True)
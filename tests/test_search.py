@@ -0,0 +1,59 @@
+import pytest
+
+from app import crud
+
+pytestmark = pytest.mark.anyio
+
+
+async def _search(client, headers, q, **params):
+    res = await client.get("/tasks/search", params={"q": q, **params}, headers=headers)
+    assert res.status_code == 200, res.text
+    return [task["title"] for task in res.json()["items"]]
+
+
+async def test_search_index_follows_writes(client, register):
+    headers = await register()
+    res = await client.post("/tasks", json={"title": "renovar pasaporte", "description": "ir al consulado"}, headers=headers)
+    task_id = res.json()["id"]
+    await client.post("/tasks/batch", json={"items": [{"title": "pagar renta"}]}, headers=headers)
+
+    assert await _search(client, headers, "pasap") == ["renovar pasaporte"]
+    assert await _search(client, headers, "consulado") == ["renovar pasaporte"]
+    assert await _search(client, headers, "renta") == ["pagar renta"]
+
+    # update: el término viejo deja de encontrar la tarea, el nuevo sí
+    await client.patch(f"/tasks/{task_id}", json={"title": "cita dentista"}, headers=headers)
+    assert await _search(client, headers, "pasaporte") == []
+    assert await _search(client, headers, "dentista") == ["cita dentista"]
+    # la descripción no cambió y sigue indexada
+    assert await _search(client, headers, "consulado") == ["cita dentista"]
+
+    # borrado lógico: el tombstone no aparece en búsquedas
+    assert (await client.delete(f"/tasks/{task_id}", headers=headers)).status_code == 204
+    assert await _search(client, headers, "dentista") == []
+    res = await client.get("/tasks/search", params={"q": "dentista"}, headers=headers)
+    assert res.json()["meta"]["total"] == 0
+
+
+async def test_search_is_scoped_to_owner(client, register):
+    alice, bob = await register(), await register()
+    await client.post("/tasks", json={"title": "proyecto secreto alfa"}, headers=alice)
+    await client.post("/tasks", json={"title": "proyecto publico"}, headers=bob)
+
+    assert await _search(client, bob, "secreto") == []
+    assert await _search(client, bob, "proyecto") == ["proyecto publico"]
+    assert await _search(client, alice, "proyecto") == ["proyecto secreto alfa"]
+    # la sintaxis FTS del usuario se trata como texto, no puede saltarse el filtro por dueño
+    assert await _search(client, bob, 'secreto OR owner:u1') == []
+
+
+async def test_like_fallback_escapes_wildcards(client, register, monkeypatch):
+    # camino de backends sin FTS5 (ILIKE); en SQLite icontains compila a lower() LIKE lower()
+    monkeypatch.setattr(crud, "IS_SQLITE", False)
+    headers = await register()
+    for title in ("descuento 50%", "lote 500", "a_b", "axb"):
+        await client.post("/tasks", json={"title": title}, headers=headers)
+
+    assert await _search(client, headers, "50%") == ["descuento 50%"]
+    assert await _search(client, headers, "a_b") == ["a_b"]
+    assert sorted(await _search(client, headers, "50")) == ["descuento 50%", "lote 500"]
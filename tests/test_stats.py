@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+
+from app import crud
+from app.db import SessionLocal, engine
+
+pytestmark = pytest.mark.anyio
+
+
+def _iso(value: datetime) -> str:
+    return value.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+@pytest.fixture
+def stats(client):
+    # compara /tasks/stats contra un conteo directo de las tareas vivas del usuario
+    async def _stats(headers) -> dict:
+        res = await client.get("/tasks/stats", headers=headers)
+        assert res.status_code == 200, res.text
+        body = res.json()
+        user_id = (await client.get("/me", headers=headers)).json()["id"]
+        async with engine.connect() as conn:
+            total, completed = (await conn.execute(text(
+                "SELECT count(*), coalesce(sum(is_completed), 0) FROM tasks "
+                "WHERE user_id = :u AND deleted_at IS NULL"
+            ), {"u": user_id})).one()
+        assert (body["total"], body["completed"]) == (total, completed)
+        assert body["pending"] == total - completed
+        return body
+
+    return _stats
+
+
+async def test_stats_follow_every_write_path(client, register, stats):
+    headers = await register()
+    assert await stats(headers) == {"total": 0, "completed": 0, "pending": 0, "overdue": 0, "due_this_week": 0}
+
+    now = datetime.now(timezone.utc)
+    ids = []
+    for title, done, due in (
+        ("overdue", False, now - timedelta(days=2)),
+        ("soon", False, now + timedelta(days=3)),
+        ("later", False, now + timedelta(days=30)),
+        ("done", True, now - timedelta(days=1)),
+        ("no due", False, None),
+    ):
+        res = await client.post(
+            "/tasks", json={"title": title, "is_completed": done, "due_date": _iso(due) if due else None}, headers=headers
+        )
+        ids.append(res.json()["id"])
+    body = await stats(headers)
+    assert body == {"total": 5, "completed": 1, "pending": 4, "overdue": 1, "due_this_week": 1}
+
+    # PATCH: completar, repetir (sin cambio), If-Match fallido (rollback), des-completar
+    await client.patch(f"/tasks/{ids[0]}", json={"is_completed": True}, headers=headers)
+    assert (await stats(headers))["completed"] == 2
+    await client.patch(f"/tasks/{ids[0]}", json={"is_completed": True}, headers=headers)
+    assert (await stats(headers))["completed"] == 2
+    res = await client.patch(f"/tasks/{ids[1]}", json={"is_completed": True}, headers={**headers, "If-Match": '"0-0"'})
+    assert res.status_code == 412
+    assert (await stats(headers))["completed"] == 2
+    await client.patch(f"/tasks/{ids[3]}", json={"is_completed": False}, headers=headers)
+    body = await stats(headers)
+    assert (body["completed"], body["overdue"]) == (1, 1)
+
+    # DELETE (tombstone) y borrar de nuevo
+    assert (await client.delete(f"/tasks/{ids[0]}", headers=headers)).status_code == 204
+    assert (await client.delete(f"/tasks/{ids[0]}", headers=headers)).status_code == 404
+    assert (await stats(headers))["total"] == 4
+
+    # lotes
+    res = await client.post("/tasks/batch", json={"items": [{"title": "b1", "is_completed": True}, {"title": "b2"}]}, headers=headers)
+    assert res.status_code == 201
+    assert (await stats(headers))["total"] == 6
+    res = await client.patch("/tasks/batch", json={"items": [
+        {"id": ids[1], "is_completed": True}, {"id": ids[2], "is_completed": True}, {"id": ids[4], "title": "x"},
+    ]}, headers=headers)
+    assert res.status_code == 200
+    assert (await stats(headers))["completed"] == 3
+    res = await client.request("DELETE", "/tasks/batch", json={"ids": [ids[1], ids[4]]}, headers=headers)
+    assert res.status_code == 200
+    body = await stats(headers)
+    assert (body["total"], body["completed"]) == (4, 2)
+
+    # import en streaming, con una línea inválida
+    lines = '{"title": "i1", "is_completed": true}\n{"title": "i2"}\n{"bad"\n'
+    res = await client.post("/tasks/import", content=lines.encode(), headers=headers)
+    assert res.json()["imported"] == 2
+    body = await stats(headers)
+    assert (body["total"], body["completed"]) == (6, 3)
+
+
+async def test_rebuild_stats_recomputes_counters(client, register, stats):
+    headers = await register()
+    for done in (True, False, False):
+        await client.post("/tasks", json={"title": "t", "is_completed": done}, headers=headers)
+    user_id = (await client.get("/me", headers=headers)).json()["id"]
+    async with engine.begin() as conn:
+        await conn.execute(text("UPDATE task_stats SET total = 99, completed = 0 WHERE user_id = :u"), {"u": user_id})
+
+    async with SessionLocal() as session:
+        assert await crud.rebuild_task_stats(session) >= 1
+    body = await stats(headers)
+    assert (body["total"], body["completed"]) == (3, 1)
@@ -0,0 +1,68 @@
+import time
+
+import pytest
+from sqlalchemy import select
+
+from app import user_cache
+from app.db import SessionLocal
+from app.models import User
+from app.user_cache import InMemoryUserCacheBackend
+
+
+def test_in_memory_backend_expires_entries():
+    backend = InMemoryUserCacheBackend()
+    backend.set("a@example.com", {"id": 1}, ttl=0.01)
+    assert backend.get("a@example.com") == {"id": 1}
+    time.sleep(0.02)
+    assert backend.get("a@example.com") is None
+
+
+def test_in_memory_backend_is_bounded():
+    backend = InMemoryUserCacheBackend(maxsize=2)
+    for i in range(3):
+        backend.set(f"u{i}@example.com", {"id": i}, ttl=60)
+    assert backend.get("u0@example.com") is None
+    assert backend.get("u2@example.com") == {"id": 2}
+    backend.delete("u2@example.com")
+    assert backend.get("u2@example.com") is None
+
+
+@pytest.fixture
+def shared_backend():
+    backend = InMemoryUserCacheBackend()
+    user_cache.set_backend(backend)
+    yield backend
+    user_cache.set_backend(None)
+
+
+def test_shared_backend_skips_local_layer(shared_backend):
+    user = User(id=1, email="w@example.com", is_active=True, created_at=None)
+    user_cache.set_user(user)
+    assert user_cache.get_user("w@example.com").id == 1
+    # otro worker invalida en el backend compartido: este no puede seguir con una copia local
+    shared_backend.delete("w@example.com")
+    assert user_cache.get_user("w@example.com") is None
+
+
+@pytest.mark.anyio
+async def test_invalidation_waits_for_commit(client, register):
+    headers = await register()
+    email = (await client.get("/me", headers=headers)).json()["email"]
+    assert user_cache.get_user(email) is not None
+
+    async with SessionLocal() as session:
+        user = (await session.execute(select(User).where(User.email == email))).scalar_one()
+        user.is_active = False
+        await session.flush()
+        # el flush no invalida: la fila nueva todavía no es visible para otras conexiones
+        assert user_cache.get_user(email) is not None
+        await session.rollback()
+    assert user_cache.get_user(email) is not None
+
+    async with SessionLocal() as session:
+        user = (await session.execute(select(User).where(User.email == email))).scalar_one()
+        user.is_active = False
+        await session.commit()
+    assert user_cache.get_user(email) is None
+    # el siguiente request relee la fila ya confirmada
+    assert (await client.get("/me", headers=headers)).json()["is_active"] is False